@@ -1,14 +1,67 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from data_processor import historical_volatility
+from instrumentation import timed
+from option_features import align_to_bars
+from option_pricing import bs_price, RISK_FREE_RATE, DEFAULT_EXPIRY_DAYS, MIN_TIME
 
 class Backtester:
-    def __init__(self, df, predictions, threshold=0.6):
+    def __init__(self, df, predictions, threshold=0.6, risk_fraction=0.02, leverage=5):
         self.df = df
         self.predictions = predictions.flatten()
         self.threshold = threshold  # Confidence threshold to take a trade
+        self.risk_fraction = risk_fraction  # Share of capital risked per trade
+        self.leverage = leverage  # Rough option leverage over the underlying move
         
+    @timed("backtest.run")
     def run(self, initial_capital=100000):
+        """
+        Vectorized backtest. Produces the same trades, final capital and win rate
+        as run_loop(), computed with array operations instead of a per-row loop.
+        """
+        print(f"\nRunning Backtest with Threshold {self.threshold}...")
+        
+        close = self.df['Close'].to_numpy(dtype=float)
+        n = len(close) - 1 # -1 because we compare with next day
+        if n <= 0:
+            return pd.DataFrame(), initial_capital, 0
+            
+        confidence = self.predictions[:n]
+        current_close, next_close = close[:-1], close[1:]
+        
+        # Signals: CALL wins over PUT when both fire (threshold < 0.5), as in the loop
+        is_call = confidence > self.threshold
+        is_put = ~is_call & (confidence < (1 - self.threshold))
+        traded = is_call | is_put
+        
+        # PUT profits from the inverse move
+        change = np.where(is_call, next_close - current_close, current_close - next_close) / current_close
+        change = change[traded]
+        
+        # Every trade risks a fixed fraction of current capital with a leverage factor, loss capped
+        # at the risk amount, so capital compounds by a fixed growth factor per trade
+        growth = 1 + np.maximum(self.risk_fraction * (change * 100 * self.leverage), -self.risk_fraction)
+        capital_before = initial_capital * np.concatenate(([1.0], np.cumprod(growth)[:-1]))
+        risk = capital_before * self.risk_fraction
+        pnl = np.maximum(risk * (change * 100 * self.leverage), -risk)
+        capital_after = capital_before + pnl
+        
+        if not len(pnl):
+            return pd.DataFrame(), initial_capital, 0
+            
+        results = pd.DataFrame({
+            'Date': self.df.index[:n][traded],
+            'Type': np.where(is_call[traded], "CALL", "PUT"),
+            'Confidence': np.round(confidence[traded], 2),
+            'PnL': np.round(pnl, 2),
+            'Capital': np.round(capital_after, 2)
+        })
+        win_rate = (np.count_nonzero(pnl > 0) / len(pnl) * 100)
+        
+        return results, capital_after[-1], win_rate
+        
+    def run_loop(self, initial_capital=100000):
+        """Reference per-row implementation of run(), kept for parity checks."""
         capital = initial_capital
         position = 0
         trades = []
@@ -43,20 +96,20 @@ class Backtester:
                 # If stock moves 1%, option might move ~20-50% depending on expiry.
                 # Simplified: Risk 2% of capital per trade. Reward is proportional to stock move * leverage.
                 # Let's assume 10x leverage for Options.
-                pnl = (capital * 0.02) * (change * 100 * 5) # 5x leverage factor rough approx
+                pnl = (capital * self.risk_fraction) * (change * 100 * self.leverage) # 5x leverage factor rough approx
                 
                 # Cap loss at risk amount
-                if pnl < -(capital * 0.02):
-                    pnl = -(capital * 0.02)
+                if pnl < -(capital * self.risk_fraction):
+                    pnl = -(capital * self.risk_fraction)
                     
             elif confidence < (1 - self.threshold):
                  # Signal: BUY PUT (Short)
                 trade_type = "PUT"
                 change = (current_close - next_close) / current_close # Inverse
-                pnl = (capital * 0.02) * (change * 100 * 5)
+                pnl = (capital * self.risk_fraction) * (change * 100 * self.leverage)
                 
-                if pnl < -(capital * 0.02):
-                    pnl = -(capital * 0.02)
+                if pnl < -(capital * self.risk_fraction):
+                    pnl = -(capital * self.risk_fraction)
             
             if trade_type:
                 total_trades_taken += 1
@@ -79,16 +132,173 @@ class Backtester:
         
         return results, capital, win_rate
 
-    def plot_equity(self, results):
+    @timed("backtest.run_options")
+    def run_options(self, initial_capital=100000, strike_step=50, expiry_days=DEFAULT_EXPIRY_DAYS,
+                    r=RISK_FREE_RATE, target=0.30, stop_loss=-0.15, volatility=None, vol_window=20,
+                    periods_per_year=252, vol_lag=None, vol_tolerance=None):
+        """
+        Option-priced backtest. On each signal bar the ATM CE/PE (strike rounded to strike_step)
+        is bought at the close, priced with Black-Scholes at expiry_days to expiry, and sold on the
+        next bar: at the open if it gaps through the target/stop, else at +target / stop_loss if the
+        bar's high/low reaches them (stop assumed first), else at the close, with one bar of decay.
+        The premium paid is risk_fraction of capital, so a trade can lose at most that.
+        volatility: annualised IV, either an array with one value per bar of df or a Series indexed
+        by time (e.g. ChainSnapshotStore.atm_iv()), which is aligned to the bars as of each bar time
+        (+ vol_lag, within vol_tolerance; see option_features.align_to_bars()).
+        Defaults to rolling historical volatility. Bars without a volatility estimate are skipped.
+        All bars are priced in one batched pass.
+        """
+        print(f"\nRunning Option Backtest with Threshold {self.threshold}...")
+        
+        close = self.df['Close'].to_numpy(dtype=float)
+        n = len(close) - 1
+        if n <= 0:
+            return pd.DataFrame(), initial_capital, 0
+        nxt = slice(1, n + 1)
+        next_open = self.df['Open'].to_numpy(dtype=float)[nxt] if 'Open' in self.df else close[nxt]
+        next_high = self.df['High'].to_numpy(dtype=float)[nxt] if 'High' in self.df else close[nxt]
+        next_low = self.df['Low'].to_numpy(dtype=float)[nxt] if 'Low' in self.df else close[nxt]
+        
+        if volatility is None:
+            volatility = historical_volatility(self.df['Close'], vol_window, periods_per_year)
+        elif isinstance(volatility, pd.Series) and not volatility.index.equals(self.df.index):
+            volatility = align_to_bars(volatility.to_frame('IV'), self.df.index, vol_lag, vol_tolerance)['IV']
+        sigma = np.asarray(volatility, dtype=float)
+        entry_sigma, exit_sigma = sigma[:n], sigma[nxt]
+        exit_sigma = np.where(np.isfinite(exit_sigma), exit_sigma, entry_sigma)
+        
+        confidence = self.predictions[:n]
+        is_call = confidence > self.threshold
+        is_put = ~is_call & (confidence < (1 - self.threshold))
+        traded = (is_call | is_put) & np.isfinite(entry_sigma) & (entry_sigma > 0)
+        
+        # Price only the traded bars: entry, and the next bar's open/high/low/close
+        idx = np.flatnonzero(traded)
+        call = is_call[idx]
+        spot = close[idx]
+        strike = np.round(spot / strike_step) * strike_step
+        t_entry = expiry_days / 365
+        t_exit = max(t_entry - 1 / periods_per_year, MIN_TIME)
+        
+        entry = bs_price(spot, strike, t_entry, r, entry_sigma[idx], call)
+        # Rows: open, high, low, close of the next bar
+        path = np.vstack([next_open[idx], next_high[idx], next_low[idx], close[nxt][idx]])
+        values = bs_price(path, strike, t_exit, r, exit_sigma[idx], call)
+        returns = values / entry - 1
+        open_ret, close_ret = returns[0], returns[3]
+        # Calls are worth most at the high, puts at the low
+        best = np.where(call, returns[1], returns[2])
+        worst = np.where(call, returns[2], returns[1])
+        
+        ret = np.where(worst <= stop_loss, stop_loss, np.where(best >= target, target, close_ret))
+        gapped = (open_ret <= stop_loss) | (open_ret >= target)
+        ret = np.where(gapped, open_ret, ret)
+        
+        if not len(ret):
+            return pd.DataFrame(), initial_capital, 0
+            
+        growth = 1 + self.risk_fraction * ret
+        capital_before = initial_capital * np.concatenate(([1.0], np.cumprod(growth)[:-1]))
+        pnl = capital_before * self.risk_fraction * ret
+        capital_after = capital_before + pnl
+        
+        results = pd.DataFrame({
+            'Date': self.df.index[idx],
+            'Type': np.where(call, "CALL", "PUT"),
+            'Confidence': np.round(confidence[idx], 2),
+            'Strike': strike,
+            'Entry': np.round(entry, 2),
+            'Exit': np.round(entry * (1 + ret), 2),
+            'Return': np.round(ret, 4),
+            'PnL': np.round(pnl, 2),
+            'Capital': np.round(capital_after, 2)
+        })
+        win_rate = np.count_nonzero(pnl > 0) / len(pnl) * 100
+        
+        return results, capital_after[-1], win_rate
+
+    @timed("backtest.sweep")
+    def sweep(self, thresholds, risk_fractions=(0.02,), leverages=(5,), initial_capital=100000,
+              periods_per_year=252, chunk_cells=5_000_000):
+        """
+        Evaluates every (threshold, risk fraction, leverage) combination in one batched pass
+        over the shared predictions. Returns one row per combination with final capital,
+        trade count, win rate, max drawdown (%) and annualised Sharpe of per-bar returns.
+        chunk_cells bounds the size of the (combinations x bars) working arrays.
+        """
+        close = self.df['Close'].to_numpy(dtype=float)
+        n = len(close) - 1
+        confidence = self.predictions[:n]
+        change = (close[1:] - close[:-1]) / close[:-1]
+        
+        thresholds = np.asarray(thresholds, dtype=float)
+        th_idx, rf, lev = np.meshgrid(np.arange(len(thresholds)),
+                                      np.asarray(risk_fractions, dtype=float),
+                                      np.asarray(leverages, dtype=float), indexing='ij')
+        th_idx, rf, lev = th_idx.ravel(), rf.ravel(), lev.ravel()
+        
+        # Direction per threshold: +1 CALL, -1 PUT, 0 no trade (CALL wins ties, as in run())
+        is_call = confidence[None, :] > thresholds[:, None]
+        is_put = ~is_call & (confidence[None, :] < (1 - thresholds[:, None]))
+        direction = is_call.astype(np.int8) - is_put.astype(np.int8)
+        
+        n_combos = len(th_idx)
+        final_capital = np.empty(n_combos)
+        trades = np.empty(n_combos, dtype=int)
+        wins = np.empty(n_combos, dtype=int)
+        max_drawdown = np.empty(n_combos)
+        sharpe = np.empty(n_combos)
+        
+        step = max(1, chunk_cells // max(n, 1))
+        for start in range(0, n_combos, step):
+            sl = slice(start, start + step)
+            d = direction[th_idx[sl]]
+            risk = rf[sl, None]
+            # Per-bar return on capital, zero on bars without a trade
+            r = np.where(d != 0, np.maximum(risk * (d * change * 100 * lev[sl, None]), -risk), 0.0)
+            
+            equity = initial_capital * np.cumprod(1 + r, axis=1)
+            peak = np.maximum(np.maximum.accumulate(equity, axis=1), initial_capital)
+            
+            final_capital[sl] = equity[:, -1] if n > 0 else initial_capital
+            trades[sl] = np.count_nonzero(d, axis=1)
+            wins[sl] = np.count_nonzero(r > 0, axis=1)
+            max_drawdown[sl] = ((1 - equity / peak).max(axis=1) * 100) if n > 0 else 0
+            
+            # Fewer than two returns have no spread (and none have no mean): Sharpe 0
+            std = r.std(axis=1, ddof=1) if n > 1 else np.zeros(len(r))
+            mean = r.mean(axis=1) if n > 1 else np.zeros(len(r))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                sharpe[sl] = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            win_rate = np.where(trades > 0, wins / trades * 100, 0.0)
+            
+        return pd.DataFrame({
+            'Threshold': thresholds[th_idx],
+            'RiskFraction': rf,
+            'Leverage': lev,
+            'FinalCapital': final_capital,
+            'Trades': trades,
+            'WinRate': win_rate,
+            'MaxDrawdown': max_drawdown,
+            'Sharpe': sharpe
+        })
+
+    @timed("backtest.plot_equity")
+    def plot_equity(self, results, path="backtest_result.png", name=None, renderer=None):
+        """
+        Saves the equity curve as a PNG (headless Agg, see reporting.render_equity_chart()).
+        With a ReportRenderer the chart is queued on its worker pool under the renderer's
+        directory as <name>.png instead, and added to its summary. Returns the chart path.
+        """
+        if renderer is not None:
+            return renderer.submit(name or "backtest", results)
         if results.empty:
             print("No trades taken.")
-            return
+            return None
             
-        plt.figure(figsize=(12, 6))
-        plt.plot(pd.to_datetime(results['Date']), results['Capital'])
-        plt.title('Backtest Equity Curve')
-        plt.xlabel('Date')
-        plt.ylabel('Capital')
-        plt.grid(True)
-        plt.savefig('backtest_result.png')
-        print("Backtest chart saved to backtest_result.png")
+        from reporting import render_equity_chart  # Only plotting runs pay for matplotlib
+        render_equity_chart(results, path)
+        print(f"Backtest chart saved to {path}")
+        return path
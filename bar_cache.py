@@ -0,0 +1,55 @@
+import os
+import pandas as pd
+from instrumentation import span, incr
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".nse_options_ml", "bars")
+
+class BarCache:
+    """
+    Persistent on-disk OHLCV cache, one Parquet file per (ticker, interval).
+    In offline mode callers must serve everything from disk and never touch the network.
+    """
+    def __init__(self, cache_dir=None, offline=False):
+        self.cache_dir = cache_dir or os.getenv('NSE_ML_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.offline = offline
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, ticker, interval):
+        safe_ticker = ticker.replace('^', '_').replace('/', '_').replace(':', '_')
+        return os.path.join(self.cache_dir, f"{safe_ticker}_{interval}.parquet")
+
+    def load(self, ticker, interval):
+        """Returns the cached bars, or None if nothing is stored yet."""
+        path = self._path(ticker, interval)
+        if not os.path.exists(path):
+            incr("cache.bars.miss")
+            return None
+        incr("cache.bars.hit")
+        with span("cache.bars.read"):
+            return pd.read_parquet(path)
+
+    def last_timestamp(self, ticker, interval):
+        df = self.load(ticker, interval)
+        if df is None or df.empty:
+            return None
+        return df.index[-1]
+
+    def append(self, ticker, interval, new_bars):
+        """
+        Merges new bars into the stored series and returns the full series.
+        Overlapping timestamps are replaced by the newer bar (e.g. an in-progress daily candle).
+        """
+        cached = self.load(ticker, interval)
+        if cached is not None and not cached.empty:
+            df = pd.concat([cached, new_bars])
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+        else:
+            df = new_bars.sort_index()
+
+        # Write to a temp file and swap so a crash never leaves a half-written cache
+        path = self._path(ticker, interval)
+        tmp_path = f"{path}.tmp"
+        with span("cache.bars.write"):
+            df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)
+        return df
@@ -0,0 +1,215 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+from data_processor import add_indicators, calculate_rsi
+from model import StockPredictor
+from backtester import Backtester
+from nse_scraper import NSEScraper
+from option_features import snapshot_features
+from synthetic_data import gbm_ohlcv, synthetic_option_chain, synthetic_chain_snapshots
+from main import FEATURE_COLS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(HERE, "benchmark_baseline.json")
+DEFAULT_THRESHOLD = 0.25  # Slower than baseline by more than this fraction is a regression
+MIN_DELTA = 0.002  # Seconds; differences below this are timer noise, never a regression
+
+# Bar series: ~10 years daily, then ~1 month and ~1 year of NSE minute bars
+DAY_SIZES = (2_500, 10_000)
+MINUTE_SIZES = (8_000, 100_000)
+CHAIN_SIZES = ((1, 100), (4, 100), (8, 150))  # (expiries, strikes per expiry)
+# Stored chain snapshots: ~2 weeks and ~1 year of minute snapshots, (snapshots, strikes per snapshot)
+SNAPSHOT_SIZES = ((3_750, 100), (93_750, 100))
+
+# Fresh-interpreter startup. `main.py --help` must stay within STARTUP_BUDGET seconds (checked even
+# without a baseline); the single-ticker imports are what a one-off suggestion run pays before any work.
+STARTUP_BUDGET = 0.5
+STARTUP_MIN_DELTA = 0.1  # Process spawn jitter is far larger than in-process timer noise
+STARTUP_COMMANDS = {
+    "startup[main --help]": [os.path.join(HERE, "main.py"), "--help"],
+    "startup[single-ticker imports]": ["-c", "import main, data_processor, bar_cache, model_registry, model; "
+                                             "model.StockPredictor()"],
+}
+
+# Absolute limits in seconds, checked even without a baseline
+BUDGETS = {
+    "startup[main --help]": STARTUP_BUDGET,
+    f"option_features[{SNAPSHOT_SIZES[-1][0]}x{SNAPSHOT_SIZES[-1][1]}]": 60.0,
+}
+
+_memo = {}
+
+def _memoized(key, build):
+    if key not in _memo:
+        _memo[key] = build()
+    return _memo[key]
+
+def _bars(freq, n):
+    return _memoized(("bars", freq, n), lambda: gbm_ohlcv(n, freq, seed=n))
+
+def _features(freq, n):
+    return _memoized(("features", freq, n), lambda: add_indicators(_bars(freq, n).copy()))
+
+def _fitted_predictor():
+    def build():
+        predictor = StockPredictor()
+        X, y, _ = predictor.prepare_data(_features("day", 2_500), FEATURE_COLS)
+        predictor.build_model()
+        predictor.train(X, y)
+        return predictor
+    return _memoized("predictor", build)
+
+def _chain(n_expiries, n_strikes):
+    return _memoized(("chain", n_expiries, n_strikes),
+                     lambda: synthetic_option_chain(n_expiries=n_expiries, n_strikes=n_strikes))
+
+def _snapshots(n_snapshots, n_strikes):
+    return _memoized(("snapshots", n_snapshots, n_strikes),
+                     lambda: synthetic_chain_snapshots(n_snapshots, n_strikes))
+
+def _bar_sizes():
+    return [("day", n) for n in DAY_SIZES] + [("minute", n) for n in MINUTE_SIZES]
+
+def _scraper():
+    # parse_chain/get_atm_strike never touch the session, so skip the cookie request
+    return NSEScraper.__new__(NSEScraper)
+
+def build_cases():
+    """
+    (name, setup, fn, repeat) for every benchmark. setup() runs untimed before each repeat and
+    its return value is passed to fn().
+    """
+    cases = [(name, lambda command=command: [sys.executable, *command],
+              lambda command: subprocess.run(command, cwd=HERE, capture_output=True, check=True), 3)
+             for name, command in STARTUP_COMMANDS.items()]
+    for freq, n in _bar_sizes():
+        label = f"{freq}:{n}"
+        cases.append((f"calculate_rsi[{label}]", lambda f=freq, n=n: _bars(f, n)['Close'],
+                      calculate_rsi, 5))
+        cases.append((f"add_indicators[{label}]", lambda f=freq, n=n: _bars(f, n).copy(),
+                      add_indicators, 5))
+        cases.append((f"prepare_data[{label}]", lambda f=freq, n=n: _features(f, n),
+                      lambda df: StockPredictor().prepare_data(df, FEATURE_COLS, train_rows=int(len(df) * 0.8)), 5))
+        cases.append((f"predict[{label}]",
+                      lambda f=freq, n=n: _fitted_predictor().scaler.transform(_features(f, n)[FEATURE_COLS].to_numpy(np.float32)),
+                      lambda X: _fitted_predictor().predict(X), 5))
+        cases.append((f"Backtester.run[{label}]",
+                      lambda f=freq, n=n: (_bars(f, n), np.random.default_rng(n).random(n)),
+                      lambda args: Backtester(*args).run(), 5))
+
+    for n in DAY_SIZES:
+        def setup(n=n):
+            predictor = StockPredictor()
+            X, y, _ = predictor.prepare_data(_features("day", n), FEATURE_COLS)
+            predictor.build_model()
+            return predictor, X, y
+        cases.append((f"train[day:{n}]", setup, lambda args: args[0].train(args[1], args[2]), 1))
+
+    for n_expiries, n_strikes in CHAIN_SIZES:
+        label = f"{n_expiries}x{n_strikes}"
+        cases.append((f"parse_chain[{label}]", lambda e=n_expiries, s=n_strikes: _chain(e, s),
+                      lambda data: _scraper().parse_chain(data), 20))
+        cases.append((f"get_atm_strike[{label}]", lambda e=n_expiries, s=n_strikes: _chain(e, s),
+                      lambda data: _scraper().get_atm_strike(data, data['records']['underlyingValue']), 20))
+
+    for n_snapshots, n_strikes in SNAPSHOT_SIZES:
+        cases.append((f"option_features[{n_snapshots}x{n_strikes}]",
+                      lambda n=n_snapshots, s=n_strikes: _snapshots(n, s), snapshot_features,
+                      3 if n_snapshots < 10_000 else 1))
+    return cases
+
+def time_case(setup, fn, repeat):
+    """Returns the per-repeat wall times (seconds); output printed by fn is swallowed."""
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            fn(arg)
+            times.append(time.perf_counter() - started)
+    return times
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_baseline(path, results, threshold):
+    """Writes results as the baseline; cases not run this time (--quick/--filter) keep their old timing."""
+    previous = load_baseline(path)
+    merged = dict(previous['results']) if previous else {}
+    merged.update({name: round(best, 6) for name, best in results.items()})
+    baseline = {
+        'created': time.strftime("%Y-%m-%d %H:%M:%S"),
+        'python': platform.python_version(),
+        'machine': f"{platform.system()} {platform.machine()} ({os.cpu_count()} CPUs)",
+        'threshold': threshold,
+        'results': merged,
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the core hot paths on synthetic data")
+    parser.add_argument("--quick", action="store_true", help="Only the smallest size of each case")
+    parser.add_argument("--filter", type=str, default=None, help="Only cases whose name contains this text")
+    parser.add_argument("--baseline", type=str, default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--save_baseline", action="store_true", help="Record this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help=f"Allowed slowdown vs baseline as a fraction (default: baseline's, else {DEFAULT_THRESHOLD})")
+    args = parser.parse_args()
+
+    cases = build_cases()
+    if args.quick:
+        smallest = {f"day:{DAY_SIZES[0]}", f"{CHAIN_SIZES[0][0]}x{CHAIN_SIZES[0][1]}",
+                    f"{SNAPSHOT_SIZES[0][0]}x{SNAPSHOT_SIZES[0][1]}", "main --help"}
+        cases = [c for c in cases if c[0].split('[')[1].rstrip(']') in smallest]
+    if args.filter:
+        cases = [c for c in cases if args.filter in c[0]]
+
+    baseline = None if args.save_baseline else load_baseline(args.baseline)
+    threshold = args.threshold
+    if threshold is None:
+        threshold = baseline.get('threshold', DEFAULT_THRESHOLD) if baseline else DEFAULT_THRESHOLD
+    reference = baseline['results'] if baseline else {}
+
+    print(f"{'Benchmark':<34} {'Best ms':>10} {'Median ms':>10} {'Baseline':>10} {'Change':>8}")
+    print("-" * 76)
+    results = {}
+    regressions = []
+    for name, setup, fn, repeat in cases:
+        times = time_case(setup, fn, repeat)
+        best = results[name] = min(times)
+        line = f"{name:<34} {best * 1000:>10.2f} {statistics.median(times) * 1000:>10.2f}"
+        if name in BUDGETS and best > BUDGETS[name]:
+            regressions.append(name)
+            line += f"  OVER {BUDGETS[name] * 1000:.0f} ms BUDGET"
+        if name in reference:
+            change = best / reference[name] - 1
+            line += f" {reference[name] * 1000:>10.2f} {change:>+8.1%}"
+            min_delta = STARTUP_MIN_DELTA if name in STARTUP_COMMANDS else MIN_DELTA
+            if change > threshold and best - reference[name] > min_delta:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line, flush=True)
+
+    if args.save_baseline:
+        print(f"\nBaseline written to {save_baseline(args.baseline, results, threshold)}")
+    elif regressions:
+        print(f"\n{len(regressions)} regression(s) over {threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    elif reference:
+        print(f"\nNo regressions over {threshold:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
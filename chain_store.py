@@ -0,0 +1,219 @@
+import os
+import glob
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from nse_scraper import OptionChainColumns
+from instrument_master import exchange_now
+
+DEFAULT_CHAIN_DIR = os.path.join(os.path.expanduser("~"), ".nse_options_ml", "chains")
+_TIME_FORMAT = "%H%M%S%f"
+
+def _expiry_key(expiry):
+    """NSE expiry string ('28-Nov-2024') -> sortable directory name ('2024-11-28')."""
+    try:
+        return datetime.strptime(expiry, "%d-%b-%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        return expiry.replace('/', '_')
+
+class ChainSnapshotStore:
+    """
+    Append-only columnar store of polled option-chain snapshots.
+
+    Layout: <root>/<symbol>/<expiry>/<trading day>/<first time>-<last time>.arrow
+    Each block is an Arrow IPC file holding a run of snapshots (one row per strike per snapshot).
+    Blocks are never rewritten; the time range in the file name lets range queries open only the
+    blocks they need. Files are read through memory maps: zero-copy with compression=None,
+    decompressing only the requested columns with 'zstd'/'lz4'.
+
+    append() only enqueues; a background thread parses, buffers and writes, so a poller is never
+    blocked on disk.
+    """
+    def __init__(self, root=None, compression="zstd", flush_rows=50_000, flush_seconds=60.0):
+        self.root = root or os.getenv('NSE_ML_CHAIN_DIR', DEFAULT_CHAIN_DIR)
+        self.compression = compression
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._queue = queue.Queue()
+        self._buffers = {}  # partition dir -> list of record batches
+        self._buffer_rows = {}
+        self._buffer_started = {}
+        self._writer = threading.Thread(target=self._run, name="chain-store-writer", daemon=True)
+        self._writer.start()
+
+    def append(self, symbol, chain, timestamp=None):
+        """
+        Queues one snapshot for writing. chain is the NSE JSON dict or an OptionChainColumns.
+        Returns immediately.
+        """
+        self._queue.put((symbol, chain, timestamp or exchange_now()))
+
+    def append_snapshot(self, timestamp, snapshot):
+        """NSEPoller callback: stores every {symbol: chain_json} in a snapshot."""
+        for symbol, chain in snapshot.items():
+            self.append(symbol, chain, timestamp)
+
+    def flush(self):
+        """Blocks until everything queued so far is written to disk."""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+        lost = sum(self._buffer_rows.values())
+        if lost:
+            print(f"Chain store: {lost} snapshot rows in {len(self._buffers)} partitions could not be written")
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                self._flush_due()
+                continue
+            if item is None:
+                return
+            try:
+                if isinstance(item, threading.Event):
+                    try:
+                        self._flush_all()
+                    finally:
+                        item.set()  # Never leave flush()/close() waiting on a failed write
+                    continue
+                self._buffer(*item)
+                self._flush_due()
+            except Exception as e:
+                print(f"Chain store write failed: {e}")
+
+    def _buffer(self, symbol, chain, timestamp):
+        if not isinstance(chain, OptionChainColumns):
+            chain = OptionChainColumns.from_json(chain)
+        day = timestamp.strftime("%Y-%m-%d")
+        ts = pd.Timestamp(timestamp).as_unit("ms")
+
+        for expiry in chain.expiries:
+            rows = chain.expiry_slice(expiry)
+            n = rows.stop - rows.start
+            if n == 0:
+                continue
+            arrays = {
+                'Timestamp': pa.array(np.full(n, ts.to_datetime64()), type=pa.timestamp("ms")),
+                'Spot': pa.array(np.full(n, np.nan if chain.spot is None else float(chain.spot))),
+            }
+            for name, column in chain.columns.items():
+                arrays[name] = pa.array(column[rows])
+            partition = os.path.join(self.root, symbol, _expiry_key(expiry), day)
+            self._buffers.setdefault(partition, []).append(pa.record_batch(arrays))
+            self._buffer_rows[partition] = self._buffer_rows.get(partition, 0) + n
+            self._buffer_started.setdefault(partition, time.monotonic())
+
+    def _flush_due(self):
+        now = time.monotonic()
+        for partition in list(self._buffers):
+            if self._buffer_rows[partition] >= self.flush_rows or \
+               now - self._buffer_started[partition] >= self.flush_seconds:
+                self._try_write_block(partition)
+
+    def _flush_all(self):
+        for partition in list(self._buffers):
+            self._try_write_block(partition)
+
+    def _try_write_block(self, partition):
+        """Writes one partition's buffer; on failure it is kept and retried after flush_seconds."""
+        try:
+            self._write_block(partition)
+        except Exception as e:
+            self._buffer_started[partition] = time.monotonic()
+            print(f"Chain store write failed for {partition} "
+                  f"({self._buffer_rows[partition]} rows kept for retry): {e}")
+
+    def _write_block(self, partition):
+        table = pa.Table.from_batches(self._buffers[partition]).combine_chunks()
+
+        times = table.column('Timestamp')
+        first = pd.Timestamp(times[0].as_py()).strftime(_TIME_FORMAT)
+        last = pd.Timestamp(times[-1].as_py()).strftime(_TIME_FORMAT)
+        os.makedirs(partition, exist_ok=True)
+        path = os.path.join(partition, f"{first}-{last}.arrow")
+        if os.path.exists(path):
+            path = os.path.join(partition, f"{first}-{last}-{time.time_ns()}.arrow")
+
+        # Write under a temp name so readers never see a partial block
+        tmp_path = f"{path}.tmp"
+        options = pa.ipc.IpcWriteOptions(compression=self.compression)
+        try:
+            with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+                writer.write_table(table)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        # Only drop the buffer once the block is on disk
+        del self._buffers[partition], self._buffer_rows[partition], self._buffer_started[partition]
+
+    def read(self, symbol, start, end, expiry=None, columns=None):
+        """
+        Snapshot rows for symbol with start <= Timestamp <= end, as a DataFrame.
+        expiry: NSE expiry string to restrict to one expiry (all expiries if None).
+        columns: subset of columns to load (Timestamp and Strike are always included).
+        Only blocks whose time range overlaps [start, end] are opened.
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        expiry_dirs = [os.path.join(self.root, symbol, _expiry_key(expiry))] if expiry else \
+            sorted(glob.glob(os.path.join(self.root, symbol, "*")))
+        if columns:
+            columns = list(dict.fromkeys(['Timestamp', 'Strike', *columns]))
+
+        frames = []
+        for expiry_dir in expiry_dirs:
+            day = start.normalize()
+            while day <= end:
+                partition = os.path.join(expiry_dir, day.strftime("%Y-%m-%d"))
+                for path in sorted(glob.glob(os.path.join(partition, "*.arrow"))):
+                    first, last = os.path.basename(path)[:-len(".arrow")].split('-')[:2]
+                    block_start = day + (datetime.strptime(first, _TIME_FORMAT) - datetime(1900, 1, 1))
+                    block_end = day + (datetime.strptime(last, _TIME_FORMAT) - datetime(1900, 1, 1))
+                    if block_end < start or block_start > end:
+                        continue
+                    frames.append(self._read_block(path, start, end, columns, os.path.basename(expiry_dir)))
+                day += timedelta(days=1)
+
+        if not frames:
+            return pd.DataFrame(columns=columns or None)
+        return pd.concat(frames, ignore_index=True)
+
+    def atm_iv(self, symbol, start, end):
+        """
+        ATM implied volatility (annualised, mean of CE/PE IV at the strike nearest spot, nearest
+        expiry) per stored snapshot, as a Series indexed by Timestamp. Can be passed as the volatility
+        of Backtester.run_options(), which aligns it to the bars by time.
+        """
+        df = self.read(symbol, start, end, columns=['Spot', 'CE_IV', 'PE_IV'])
+        if df.empty:
+            return pd.Series(dtype=float)
+        df = df[df['Expiry'] == df.groupby('Timestamp')['Expiry'].transform('min')]
+        df = df.assign(Distance=(df['Strike'] - df['Spot']).abs())
+        atm = df.loc[df.groupby('Timestamp')['Distance'].idxmin()]
+        # NSE reports IV in percent (0 when there is no quote)
+        iv = atm[['CE_IV', 'PE_IV']].replace(0, np.nan).mean(axis=1) / 100
+        return pd.Series(iv.to_numpy(), index=atm['Timestamp'].to_numpy(), name='ATM_IV')
+
+    def _read_block(self, path, start, end, columns, expiry):
+        with pa.memory_map(path, 'r') as source:
+            reader = pa.ipc.open_file(source)
+            if columns:
+                fields = [reader.schema.get_field_index(c) for c in columns if c in reader.schema.names]
+                reader = pa.ipc.open_file(source, options=pa.ipc.IpcReadOptions(included_fields=fields))
+            table = reader.read_all()
+        df = table.to_pandas()
+        df = df[(df['Timestamp'] >= start) & (df['Timestamp'] <= end)]
+        df.insert(1, 'Expiry', expiry)
+        return df
@@ -1,23 +1,58 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
+from instrumentation import span, timed, incr
 
-def fetch_data(ticker, period="10y", interval="1d"):
+def _download(ticker, **kwargs):
+    import yfinance as yf  # Slow to import, and only needed when bars are actually downloaded
+    with span("network.yfinance"):
+        df = yf.download(ticker, progress=False, **kwargs)
+    incr("yfinance.requests")
+    # yfinance does not expose the response size; count the bytes of the bars received
+    incr("yfinance.bytes", int(df.memory_usage(deep=True).sum()))
+    # Flatten yfinance's (Price, Ticker) MultiIndex so bars can be stored and merged
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    return df
+
+@timed("fetch_data")
+def fetch_data(ticker, period="10y", interval="1d", cache=None):
     """
     Fetches historical data for a given NSE ticker.
     Adds '.NS' suffix if missing.
+    With a BarCache, only bars after the last cached timestamp are downloaded and
+    the full stored history is returned (period only applies to the first download).
     """
     if not ticker.endswith(".NS") and not ticker.startswith("^"):
         ticker = f"{ticker}.NS"
     
+    if cache is not None:
+        cached = cache.load(ticker, interval)
+        if cache.offline:
+            if cached is None or cached.empty:
+                raise ValueError(f"No cached data for {ticker} (offline mode)")
+            return cached
+            
+        if cached is not None and not cached.empty:
+            print(f"Refreshing cached data for {ticker}...")
+            # Re-fetch from the last cached day so a partial last bar gets completed
+            start = pd.Timestamp(cached.index[-1]).strftime("%Y-%m-%d")
+            new_bars = _download(ticker, start=start, interval=interval)
+            if new_bars.empty:
+                return cached
+            return cache.append(ticker, interval, new_bars)
+    
     print(f"Fetching data for {ticker}...")
-    df = yf.download(ticker, period=period, interval=interval, progress=False)
+    df = _download(ticker, period=period, interval=interval)
     
     if df.empty:
         raise ValueError(f"No data found for {ticker}")
         
+    if cache is not None:
+        df = cache.append(ticker, interval, df)
+        
     return df
 
+@timed("calculate_rsi")
 def calculate_rsi(series, period=14):
     delta = series.diff()
     gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
@@ -26,6 +61,12 @@ def calculate_rsi(series, period=14):
     rs = gain / loss
     return 100 - (100 / (1 + rs))
 
+def historical_volatility(series, window=20, periods_per_year=252):
+    """Annualised rolling volatility of log returns."""
+    log_returns = np.log(series / series.shift(1))
+    return log_returns.rolling(window=window).std() * np.sqrt(periods_per_year)
+
+@timed("add_indicators")
 def add_indicators(df):
     """
     Adds technical indicators to the dataframe using pandas.
@@ -63,3 +104,126 @@ def add_indicators(df):
     df.dropna(inplace=True)
     
     return df
+
+class StreamingIndicators:
+    """
+    Stateful, O(1)-per-bar version of add_indicators() for intraday/live use.
+    Keeps running EMA values, rolling-window sums (and sums of squares) and RSI gain/loss state.
+    Fed the same closes from the same first bar, the output matches add_indicators()
+    within floating-point tolerance (values are NaN until their window is full).
+    """
+    EMA_SPANS = (12, 26, 50, 200)
+    COLUMNS = ['RSI', 'EMA_12', 'EMA_26', 'EMA_50', 'EMA_200', 'MACD', 'MACD_SIGNAL',
+               'SMA_20', 'STD_20', 'BB_UPPER', 'BB_LOWER']
+
+    def __init__(self, rsi_period=14, bb_window=20, signal_span=9):
+        self.rsi_period = rsi_period
+        self.bb_window = bb_window
+        self.signal_alpha = 2 / (signal_span + 1)
+        self.ema_alpha = {span: 2 / (span + 1) for span in self.EMA_SPANS}
+        
+        self.count = 0
+        self.prev_close = None
+        self.ema = {}
+        self.macd_signal = None
+        
+        # RSI ring buffers of per-bar gains/losses and their running sums
+        self._gains = np.zeros(rsi_period)
+        self._losses = np.zeros(rsi_period)
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        
+        # Bollinger ring buffer of closes, shifted by the first close to limit cancellation in sum of squares
+        self._closes = np.zeros(bb_window)
+        self._shift = None
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    @property
+    def ready(self):
+        """True once every indicator window is full."""
+        return self.count >= max(self.rsi_period, self.bb_window)
+
+    def update(self, close):
+        """Adds one bar close and returns the current indicator values as a dict."""
+        close = float(close)
+        
+        # RSI: the first bar has no delta and counts as zero gain / zero loss, like the batch version
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        slot = self.count % self.rsi_period
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        self._gain_sum += gain - self._gains[slot]
+        self._loss_sum += loss - self._losses[slot]
+        self._gains[slot], self._losses[slot] = gain, loss
+        
+        # EMAs (adjust=False): seeded with the first value
+        for span, alpha in self.ema_alpha.items():
+            prev = self.ema.get(span)
+            self.ema[span] = close if prev is None else alpha * close + (1 - alpha) * prev
+        macd = self.ema[12] - self.ema[26]
+        self.macd_signal = macd if self.macd_signal is None else \
+            self.signal_alpha * macd + (1 - self.signal_alpha) * self.macd_signal
+        
+        # Rolling mean / std for Bollinger Bands
+        if self._shift is None:
+            self._shift = close
+        shifted = close - self._shift
+        slot = self.count % self.bb_window
+        old = self._closes[slot]
+        self._sum += shifted - old
+        self._sumsq += shifted * shifted - old * old
+        self._closes[slot] = shifted
+        
+        self.prev_close = close
+        self.count += 1
+        
+        # Re-sum the ring buffers once per wrap so add/subtract drift cannot accumulate
+        if self.count % self.rsi_period == 0:
+            self._gain_sum = self._gains.sum()
+            self._loss_sum = self._losses.sum()
+        if self.count % self.bb_window == 0:
+            self._sum = self._closes.sum()
+            self._sumsq = np.dot(self._closes, self._closes)
+            
+        return self._values(macd)
+
+    def update_many(self, closes, index=None):
+        """Feeds a batch of closes in order and returns a DataFrame with one row per bar."""
+        rows = [self.update(c) for c in np.asarray(closes, dtype=float)]
+        return pd.DataFrame(rows, index=index, columns=self.COLUMNS)
+
+    def _values(self, macd):
+        nan = float('nan')
+        
+        rsi = nan
+        if self.count >= self.rsi_period:
+            gain = self._gain_sum / self.rsi_period
+            loss = self._loss_sum / self.rsi_period
+            if loss > 0:
+                rsi = 100 - (100 / (1 + gain / loss))
+            elif gain > 0:
+                rsi = 100.0
+                
+        sma = std = upper = lower = nan
+        n = self.bb_window
+        if self.count >= n:
+            mean = self._sum / n
+            var = max((self._sumsq - self._sum * mean) / (n - 1), 0.0)
+            sma = mean + self._shift
+            std = np.sqrt(var)
+            upper = sma + (std * 2)
+            lower = sma - (std * 2)
+            
+        return {
+            'RSI': rsi,
+            'EMA_12': self.ema[12],
+            'EMA_26': self.ema[26],
+            'EMA_50': self.ema[50],
+            'EMA_200': self.ema[200],
+            'MACD': macd,
+            'MACD_SIGNAL': self.macd_signal,
+            'SMA_20': sma,
+            'STD_20': std,
+            'BB_UPPER': upper,
+            'BB_LOWER': lower
+        }
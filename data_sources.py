@@ -0,0 +1,339 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import timedelta
+from instrumentation import span, incr
+
+INDEX_TOKENS = {'^NSEI': 256265, '^NSEBANK': 260105}
+
+def _is_empty(value):
+    return value is None or getattr(value, 'empty', False)
+
+class TTLCache:
+    """Thread-safe LRU cache of at most maxsize entries, each expiring ttl seconds after it was stored."""
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns (found, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def put(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class DataSource:
+    """
+    One market-data backend. Subclasses list the kinds of data they serve in `ttl`
+    (kind -> seconds a result stays cached, 0 = never cached) and implement fetch(kind, **params),
+    returning None or an empty frame when they have no answer.
+
+    get() adds the per-source TTL/LRU cache, coalesces concurrent requests for the same key into
+    one fetch, and keeps hit-rate and latency stats.
+    """
+    name = "source"
+    ttl = {}
+
+    def __init__(self, cache_size=256):
+        self.cache = TTLCache(cache_size)
+        self._inflight = {}  # key -> Future of the fetch in progress
+        self._lock = threading.Lock()
+        self.counts = {'requests': 0, 'hits': 0, 'coalesced': 0, 'fetches': 0, 'empty': 0, 'errors': 0}
+        self.fetch_seconds = 0.0
+
+    def available(self):
+        """False when the backend cannot be used in this run (no session, offline, ...)."""
+        return True
+
+    def supports(self, kind):
+        return kind in self.ttl and self.available()
+
+    def fetch(self, kind, **params):
+        raise NotImplementedError
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+        incr(f"source.{self.name}.{name}")
+
+    def get(self, kind, **params):
+        key = (kind, tuple(sorted(params.items())))
+        self._count('requests')
+        found, value = self.cache.get(key)
+        if found:
+            self._count('hits')
+            return value
+
+        with self._lock:
+            # Re-check under the lock: a fetch for this key may have finished in the meantime
+            found, value = self.cache.get(key)
+            future = self._inflight.get(key)
+            leader = not found and future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if found:
+            self._count('hits')
+            return value
+        if not leader:
+            self._count('coalesced')
+            return future.result()
+
+        self._count('fetches')
+        started = time.perf_counter()
+        try:
+            with span(f"source.{self.name}.{kind}"):
+                value = self.fetch(kind, **params)
+        except Exception as e:
+            self._count('errors')
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self.fetch_seconds += time.perf_counter() - started
+                del self._inflight[key]
+
+        if _is_empty(value):
+            self._count('empty')
+        elif self.ttl[kind] > 0:
+            self.cache.put(key, value, self.ttl[kind])
+        future.set_result(value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self.counts)
+            fetch_seconds = self.fetch_seconds
+        served = counts['hits'] + counts['coalesced']
+        return {
+            'source': self.name,
+            **counts,
+            'hit_rate': served / counts['requests'] if counts['requests'] else 0.0,
+            'mean_fetch_ms': fetch_seconds / counts['fetches'] * 1000 if counts['fetches'] else 0.0,
+        }
+
+class MarketData:
+    """
+    Routes each request to the sources that serve its kind, in priority order (lowest first);
+    the first non-empty answer wins and a failing or empty source falls through to the next.
+    Returned values are copies, so callers may modify them without touching cached data.
+    """
+    def __init__(self, sources=()):
+        self.sources = []
+        for source in sources:
+            self.add(source)
+
+    def add(self, source, priority=None):
+        """Registers a source. Without a priority it goes after every source added so far."""
+        source.priority = len(self.sources) if priority is None else priority
+        self.sources.append(source)
+        self.sources.sort(key=lambda s: s.priority)
+        return source
+
+    def get(self, kind, **params):
+        for source in self.sources:
+            if not source.supports(kind):
+                continue
+            try:
+                value = source.get(kind, **params)
+            except Exception as e:
+                print(f"{source.name}: {kind} request failed ({e}), trying next source")
+                continue
+            if not _is_empty(value):
+                return value.copy() if hasattr(value, 'copy') else value
+        return None
+
+    def stats(self):
+        return [source.stats() for source in self.sources]
+
+    def print_stats(self):
+        print(f"\n{'Source':<12} {'Requests':>9} {'Hits':>6} {'Coalesced':>10} {'Fetches':>8} "
+              f"{'Errors':>7} {'Hit rate':>9} {'Fetch ms':>9}")
+        print("-" * 76)
+        for row in self.stats():
+            print(f"{row['source']:<12} {row['requests']:>9} {row['hits']:>6} {row['coalesced']:>10} "
+                  f"{row['fetches']:>8} {row['errors']:>7} {row['hit_rate']:>9.1%} {row['mean_fetch_ms']:>9.1f}")
+
+class StaticTokenSource(DataSource):
+    """Instrument tokens from a fixed mapping (e.g. index tokens, which need no Kite lookup)."""
+    name = "static"
+    ttl = {'instrument_token': 0}
+
+    def __init__(self, tokens=None):
+        super().__init__()
+        self.tokens = dict(INDEX_TOKENS if tokens is None else tokens)
+
+    def fetch(self, kind, ticker):
+        return self.tokens.get(ticker)
+
+class KiteSource(DataSource):
+    """
+    Kite Connect: instrument tokens, price history (chunked daily bars, or intraday bars built
+    from cached 1-minute bars) and ATM option quotes. Unused without an access token; offline,
+    it only serves history already in the BarCache.
+    """
+    name = "kite"
+    ttl = {'instrument_token': 86400, 'history': 300, 'atm_options': 2}
+
+    def __init__(self, kite=None, cache=None, workers=4):
+        super().__init__()
+        self.kite = kite
+        self.bar_cache = cache
+        self.workers = workers
+
+    def _offline(self):
+        return self.bar_cache is not None and self.bar_cache.offline
+
+    def available(self):
+        return self._offline() or bool(self.kite and self.kite.access_token)
+
+    def supports(self, kind):
+        return super().supports(kind) and (kind == 'history' or not self._offline())
+
+    def fetch(self, kind, **params):
+        return getattr(self, f"_fetch_{kind}")(**params)
+
+    def _fetch_instrument_token(self, ticker):
+        instrument = self.kite.get_instrument_master("NSE").instrument(ticker.replace('.NS', ''))
+        return instrument['instrument_token'] if instrument else None
+
+    def _fetch_history(self, ticker, interval="day", days=3650):
+        from instrument_master import exchange_now
+        from intraday import fetch_history_chunked, load_intraday
+        # Offline the cache is keyed by ticker, so no token lookup is needed
+        token = None
+        if not self._offline():
+            token = INDEX_TOKENS.get(ticker) or self.get('instrument_token', ticker=ticker)
+            if token is None:
+                return None
+        if interval == "day":
+            to_date = exchange_now()
+            return fetch_history_chunked(self.kite, token, to_date - timedelta(days=days), to_date, "day",
+                                         workers=self.workers, cache=self.bar_cache, ticker=ticker)
+        return load_intraday(self.kite, token, ticker, interval, days, workers=self.workers, cache=self.bar_cache)
+
+    def _fetch_atm_options(self, symbol, spot, strike_step=50, volatility=None):
+        print(f"Fetching Option Prices from Kite for {symbol}...")
+        # Both ATM legs in a single batched quote request
+        ladder = self.kite.get_option_ladder({symbol: spot}, n_strikes=0)
+        if ladder.empty:
+            return None
+        legs = ladder.set_index('Type')['LTP']
+        ce_price, pe_price = legs.get('CE') or 0, legs.get('PE') or 0
+        if ce_price == 0:
+            return None
+        return {'Strike': int(ladder['Strike'].iloc[0]), 'CE': ce_price, 'PE': pe_price, 'Source': "Kite API"}
+
+class NSESource(DataSource):
+    """
+    NSE website option chains (one shared scraper session). ATM quotes are read from the cached
+    chain, so several lookups on one symbol cost a single download. Fetched chains are also written
+    to chain_store, if given.
+    """
+    name = "nse"
+    ttl = {'option_chain': 15, 'atm_options': 15}
+
+    def __init__(self, chain_store=None):
+        super().__init__()
+        self.chain_store = chain_store
+        self._scraper = None
+        self._scraper_lock = threading.Lock()
+
+    @property
+    def scraper(self):
+        with self._scraper_lock:
+            if self._scraper is None:
+                from nse_scraper import NSEScraper
+                self._scraper = NSEScraper()
+            return self._scraper
+
+    def fetch(self, kind, symbol, **params):
+        if kind == 'option_chain':
+            print(f"Fetching Live Option Chain for {symbol} (Scraper)...")
+            chain_data = self.scraper.fetch_option_chain(symbol)
+            if chain_data and self.chain_store is not None:
+                self.chain_store.append(symbol, chain_data)
+            return chain_data
+        return self._atm_options(symbol, **params)
+
+    def _atm_options(self, symbol, spot, strike_step=50, volatility=None):
+        import numpy as np
+        chain_data = self.get('option_chain', symbol=symbol)
+        if not chain_data:
+            return None
+        # Parse once; ATM lookup is a searchsorted on the near-expiry strikes
+        chain = self.scraper.parse_chain_columns(chain_data)
+        atm = chain.atm_strike(spot)
+        if not atm:
+            return None
+        i = chain.expiry_slice().start + int(np.searchsorted(chain.strikes(), atm))
+        ce_price = np.nan_to_num(chain.columns['CE_LTP'][i])
+        pe_price = np.nan_to_num(chain.columns['PE_LTP'][i])
+        if ce_price == 0:
+            return None
+        return {'Strike': atm, 'CE': ce_price, 'PE': pe_price, 'Source': "NSE Live"}
+
+class YFinanceSource(DataSource):
+    """
+    Daily price history from Yahoo Finance, through the on-disk BarCache if given.
+    Intraday intervals are not served (None), so callers report missing data rather than
+    silently training on daily bars.
+    """
+    name = "yfinance"
+    ttl = {'history': 300}
+
+    def __init__(self, cache=None):
+        super().__init__()
+        self.bar_cache = cache
+
+    def fetch(self, kind, ticker, interval="day", days=None):
+        if interval != "day":
+            return None
+        import pandas as pd
+        from data_processor import fetch_data
+        df = fetch_data(ticker, cache=self.bar_cache)
+        if days:
+            df = df[df.index >= df.index[-1] - pd.Timedelta(days=days)]
+        return df
+
+class EstimateSource(DataSource):
+    """Last resort for ATM option prices: Black-Scholes on the given (or default) volatility."""
+    name = "estimate"
+    ttl = {'atm_options': 0}
+
+    def fetch(self, kind, symbol, spot, strike_step=50, volatility=None):
+        import numpy as np
+        from option_pricing import bs_price, RISK_FREE_RATE, DEFAULT_VOLATILITY, DEFAULT_EXPIRY_DAYS
+        sigma = volatility if volatility and np.isfinite(volatility) else DEFAULT_VOLATILITY
+        strike = round(spot / strike_step) * strike_step
+        ce_price, pe_price = bs_price(spot, strike, DEFAULT_EXPIRY_DAYS / 365, RISK_FREE_RATE, sigma,
+                                      np.array([True, False]))
+        return {'Strike': strike, 'CE': ce_price, 'PE': pe_price,
+                'Source': f"Black-Scholes Estimate (Vol {sigma:.1%}, {DEFAULT_EXPIRY_DAYS}d to expiry)"}
+
+def default_sources(kite=None, cache=None, chain_store=None):
+    """The standard fallback order. New backends are added here, not in main.py."""
+    return [
+        StaticTokenSource(),
+        KiteSource(kite, cache),
+        NSESource(chain_store),
+        YFinanceSource(cache),
+        EstimateSource(),
+    ]
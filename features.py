@@ -0,0 +1,23 @@
+# Model feature columns, declared by group. Kept free of heavy imports so main.py can read it at startup.
+
+FEATURE_GROUPS = {
+    # data_processor.add_indicators(), from Close
+    'price': ('RSI', 'MACD', 'MACD_SIGNAL', 'BB_UPPER', 'BB_LOWER', 'EMA_50', 'EMA_200'),
+    # option_features.snapshot_features(), from stored option-chain snapshots
+    'options': ('PCR_OI', 'PCR_VOLUME', 'MAX_PAIN_DIST', 'ATM_IV', 'IV_SKEW', 'STRADDLE_PCT',
+                'CE_OI_CHG', 'PE_OI_CHG'),
+}
+
+def register_features(group, columns):
+    """Declares a feature group (or adds columns to an existing one)."""
+    FEATURE_GROUPS[group] = tuple(dict.fromkeys([*FEATURE_GROUPS.get(group, ()), *columns]))
+
+def feature_columns(*names):
+    """
+    Ordered column list for any mix of group names and column names, e.g.
+    feature_columns('price', 'options') or feature_columns('price', 'ATM_IV').
+    """
+    columns = []
+    for name in names:
+        columns.extend(FEATURE_GROUPS.get(name, (name,)))
+    return list(dict.fromkeys(columns))
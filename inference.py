@@ -0,0 +1,185 @@
+import numpy as np
+
+_ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0, out=x),
+    'tanh': np.tanh,
+    'logistic': lambda x: 1 / (1 + np.exp(-x)),
+    'identity': lambda x: x,
+}
+
+def input_scaling(predictor, ticker=None):
+    """
+    (mean, scale) the predictor's model expects raw feature rows to be standardised with: the
+    fitted StandardScaler, or for a PooledPredictor the z-score stats of `ticker` (its shared
+    scaler is unused). Either may be None when the scaler skips that step.
+    """
+    stats = getattr(predictor, 'stats', None)
+    if stats is not None:
+        if ticker not in stats:
+            raise ValueError(f"{ticker!r} is not in the pooled model's universe")
+        mean, std = stats[ticker]
+        return np.asarray(mean, dtype=np.float64), np.asarray(std, dtype=np.float64)
+    scaler = predictor.scaler
+    if not hasattr(scaler, 'n_features_in_'):
+        raise ValueError("predictor's scaler is not fitted")
+    return getattr(scaler, 'mean_', None), getattr(scaler, 'scale_', None)
+
+def _fold_weights(predictor, ticker=None):
+    """MLP weights with the input scaling (see input_scaling()) folded into the first layer, as float64 arrays."""
+    model = predictor.model
+    weights = [w.astype(np.float64) for w in model.coefs_]
+    biases = [b.astype(np.float64) for b in model.intercepts_]
+    # (x - mean) / scale @ W + b  ==  x @ (W / scale) + (b - (mean / scale) @ W)
+    mean, scale = input_scaling(predictor, ticker)
+    scale = np.ones(len(weights[0])) if scale is None else scale
+    if mean is not None:
+        biases[0] = biases[0] - (mean / scale) @ weights[0]
+    weights[0] = weights[0] / scale[:, None]
+    return weights, biases
+
+class NumpyMLP:
+    """
+    Plain NumPy forward pass of a fitted binary MLPClassifier plus its scaler, with no sklearn
+    dispatch. predict() takes raw (unscaled) feature rows and returns P(class 1).
+    A PooledPredictor is exported for one ticker, with that ticker's z-score folded in.
+    """
+    def __init__(self, predictor, ticker=None):
+        if predictor.model.out_activation_ != 'logistic':
+            raise ValueError("NumpyMLP supports binary classifiers only")
+        self.weights, self.biases = _fold_weights(predictor, ticker)
+        self.activation = _ACTIVATIONS[predictor.model.activation]
+        self.activation_name = predictor.model.activation
+
+    @property
+    def shapes(self):
+        return tuple(w.shape for w in self.weights)
+
+    def predict(self, X):
+        h = np.asarray(X, dtype=np.float64)
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            h = h @ w
+            h += b
+            if i < last:
+                h = self.activation(h)
+        return 1 / (1 + np.exp(-h[:, 0]))
+
+class StackedMLP:
+    """
+    Many NumpyMLPs of identical architecture evaluated together: layer weights are stacked to
+    (n_models, in, out) so one batched matmul per layer scores one row for every model.
+    """
+    def __init__(self, mlps):
+        self.activation = mlps[0].activation
+        self.n_models = len(mlps)
+        self.weights = [np.stack([m.weights[i] for m in mlps]) for i in range(len(mlps[0].weights))]
+        self.biases = [np.stack([m.biases[i] for m in mlps])[:, None, :] for i in range(len(mlps[0].biases))]
+
+    def predict(self, X, models=None):
+        """X: (k, n_features), row j scored by model models[j] (all models in order if None)."""
+        h = np.asarray(X, dtype=np.float64)[:, None, :]
+        last = len(self.weights) - 1
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            if models is not None:
+                w, b = w[models], b[models]
+            h = np.matmul(h, w)
+            h += b
+            if i < last:
+                h = self.activation(h)
+        return 1 / (1 + np.exp(-h[:, 0, 0]))
+
+class InferenceService:
+    """
+    Holds fitted predictors in memory and scores pending rows in batches.
+    submit() queues a raw feature row per key (e.g. ticker); flush() scores everything queued with
+    one call per model (rows stacked, scaled once) and returns {key: P(bullish)}.
+    With use_numpy, models are exported to NumpyMLP, and single-row models sharing an architecture
+    are scored together through StackedMLP.
+    """
+    def __init__(self, use_numpy=True):
+        self.use_numpy = use_numpy
+        self.models = {}  # key -> model id
+        self.predictors = {}  # model id -> StockPredictor
+        self.scaling = {}  # model id -> (mean, scale) of its input rows
+        self.numpy_models = {}  # model id -> NumpyMLP
+        self.pending = []  # (key, row)
+        self._stacks = None  # architecture -> StackedMLP
+        self._slots = None  # model id -> (architecture, index in its stack)
+
+    def register(self, key, predictor, ticker=None):
+        """
+        Registers a fitted predictor for key. Keys may share one predictor. A PooledPredictor
+        scales each ticker's rows with that ticker's own stats, so it is registered per ticker
+        (ticker defaults to key) and scored as one model per ticker.
+        """
+        ticker = key if ticker is None else ticker
+        model_id = (id(predictor), ticker) if getattr(predictor, 'stats', None) is not None else id(predictor)
+        self.models[key] = model_id
+        if model_id not in self.predictors:
+            self.scaling[model_id] = input_scaling(predictor, ticker)
+            self.predictors[model_id] = predictor
+            if self.use_numpy:
+                self.numpy_models[model_id] = NumpyMLP(predictor, ticker)
+            self._stacks = self._slots = None
+
+    def submit(self, key, row):
+        self.pending.append((key, row))
+
+    def predict(self, rows):
+        """Scores {key: row} immediately. Returns {key: probability}."""
+        self.pending.extend(rows.items())
+        return self.flush()
+
+    def flush(self):
+        """Scores all queued rows. With several rows per key the latest row's probability wins."""
+        if not self.pending:
+            return {}
+        pending, self.pending = self.pending, []
+        keys = [key for key, _ in pending]
+        X = np.array([np.ravel(row) for _, row in pending], dtype=np.float64)
+        model_ids = [self.models[key] for key in keys]
+
+        groups = {}
+        for i, model_id in enumerate(model_ids):
+            groups.setdefault(model_id, []).append(i)
+
+        probs = np.empty(len(keys))
+        singles = []
+        for model_id, rows in groups.items():
+            if self.use_numpy and len(rows) == 1:
+                singles.append(rows[0])
+            elif self.use_numpy:
+                probs[rows] = self.numpy_models[model_id].predict(X[rows])
+            else:
+                mean, scale = self.scaling[model_id]
+                X_scaled = X[rows] - (0 if mean is None else mean)
+                probs[rows] = self.predictors[model_id].predict(X_scaled / (1 if scale is None else scale))
+        if singles:
+            self._score_stacked(X, model_ids, singles, probs)
+        return dict(zip(keys, probs.tolist()))
+
+    def _build_stacks(self):
+        by_arch = {}
+        for model_id, mlp in self.numpy_models.items():
+            by_arch.setdefault((mlp.shapes, mlp.activation_name), []).append(model_id)
+        self._stacks, self._slots = {}, {}
+        for arch, ids in by_arch.items():
+            self._stacks[arch] = StackedMLP([self.numpy_models[i] for i in ids])
+            for index, model_id in enumerate(ids):
+                self._slots[model_id] = (arch, index)
+
+    def _score_stacked(self, X, model_ids, rows, probs):
+        if self._stacks is None:
+            self._build_stacks()
+        by_arch = {}
+        for i in rows:
+            arch, index = self._slots[model_ids[i]]
+            members = by_arch.setdefault(arch, ([], []))
+            members[0].append(i)
+            members[1].append(index)
+        for arch, (rows, indices) in by_arch.items():
+            stack = self._stacks[arch]
+            indices = np.array(indices)
+            # Skip the weight gather when every stacked model is scored, in stack order
+            full = len(indices) == stack.n_models and (indices == np.arange(stack.n_models)).all()
+            probs[rows] = stack.predict(X[rows], None if full else indices)
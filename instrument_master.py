@@ -0,0 +1,118 @@
+import os
+import glob
+import pickle
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import numpy as np
+from instrumentation import incr
+
+DEFAULT_INSTRUMENT_DIR = os.path.join(os.path.expanduser("~"), ".nse_options_ml", "instruments")
+
+EXCHANGE_TZ = ZoneInfo("Asia/Kolkata")
+
+def exchange_now():
+    """
+    Current exchange time (IST) as a naive datetime, the convention of Kite's exchange_timestamp
+    and request dates and of stored chain snapshots, whatever the host's time zone.
+    """
+    return datetime.now(EXCHANGE_TZ).replace(tzinfo=None)
+
+def trading_day():
+    """Current date in exchange time (IST)."""
+    return exchange_now().date()
+
+class InstrumentMaster:
+    """
+    Kite instrument dump for one exchange, downloaded at most once per trading day and
+    cached on disk. Options are indexed by (name, strike, instrument_type, expiry) with the
+    nearest live expiry per (name, strike, instrument_type) precomputed, so lookups are dict hits.
+    """
+    def __init__(self, fetch_fn, exchange="NFO", cache_dir=None, day=None):
+        # fetch_fn(exchange) -> list of instrument dicts (e.g. KiteConnect.instruments)
+        self.fetch_fn = fetch_fn
+        self.exchange = exchange
+        self.cache_dir = cache_dir or os.getenv('NSE_ML_INSTRUMENT_DIR', DEFAULT_INSTRUMENT_DIR)
+        self.day = day or trading_day()
+        self.loaded = False
+
+    def _path(self):
+        return os.path.join(self.cache_dir, f"instruments_{self.exchange}_{self.day.isoformat()}.pkl")
+
+    def load(self):
+        """Loads today's dump from disk, or downloads and caches it. Returns self."""
+        if self.loaded:
+            return self
+        path = self._path()
+        instruments = None
+        if os.path.exists(path):
+            incr("cache.instruments.hit")
+            with open(path, 'rb') as f:
+                instruments = pickle.load(f)
+        else:
+            incr("cache.instruments.miss")
+            print(f"Downloading {self.exchange} instrument master...")
+            instruments = self.fetch_fn(self.exchange)
+            if instruments:
+                self._save(instruments)
+
+        self._build_index(instruments or [])
+        self.loaded = bool(instruments)
+        return self
+
+    def _save(self, instruments):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(instruments, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        # Previous days' dumps are stale
+        for old in glob.glob(os.path.join(self.cache_dir, f"instruments_{self.exchange}_*.pkl")):
+            if old != path:
+                os.remove(old)
+
+    def _build_index(self, instruments):
+        self.by_symbol = {}
+        self.options = {}
+        self.nearest = {}
+        expiries = {}
+        strikes = {}
+
+        for inst in instruments:
+            self.by_symbol[inst['tradingsymbol']] = inst
+            if inst.get('instrument_type') not in ("CE", "PE"):
+                continue
+            expiry = inst['expiry']
+            if expiry and expiry < self.day:
+                continue
+            name, strike, opt_type = inst['name'], float(inst['strike']), inst['instrument_type']
+            self.options[(name, strike, opt_type, expiry)] = inst
+
+            key = (name, strike, opt_type)
+            current = self.nearest.get(key)
+            if current is None or expiry < current['expiry']:
+                self.nearest[key] = inst
+            expiries.setdefault(name, set()).add(expiry)
+            strikes.setdefault((name, expiry), set()).add(strike)
+
+        self.expiries = {name: sorted(values) for name, values in expiries.items()}
+        self.strikes = {key: np.array(sorted(values)) for key, values in strikes.items()}
+
+    def option(self, name, strike, opt_type="CE", expiry=None):
+        """Returns the instrument dict for an option (nearest expiry if none given), or None."""
+        if expiry is None:
+            return self.nearest.get((name, float(strike), opt_type))
+        return self.options.get((name, float(strike), opt_type, expiry))
+
+    def instrument(self, tradingsymbol):
+        return self.by_symbol.get(tradingsymbol)
+
+    def nearest_expiry(self, name):
+        expiries = self.expiries.get(name)
+        return expiries[0] if expiries else None
+
+    def strike_ladder(self, name, expiry=None):
+        """Sorted strikes listed for name/expiry (nearest expiry if none given)."""
+        expiry = expiry or self.nearest_expiry(name)
+        return self.strikes.get((name, expiry), np.array([]))
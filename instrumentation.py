@@ -0,0 +1,121 @@
+import csv
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+class Recorder:
+    """
+    Thread-safe accumulator of timing spans (count, total and max seconds per name) and
+    counters (bytes downloaded, cache hits, ...) for one run.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.spans = {}  # name -> [count, total seconds, max seconds]
+            self.counters = {}
+            self.started = time.time()
+
+    def add_span(self, name, seconds):
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                self.spans[name] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self):
+        """Picklable copy of everything recorded so far."""
+        with self._lock:
+            return {'spans': {name: list(stats) for name, stats in self.spans.items()},
+                    'counters': dict(self.counters)}
+
+    def merge(self, snapshot):
+        """Adds a snapshot taken in another process (e.g. a scan worker) to this recorder."""
+        with self._lock:
+            for name, (count, total, longest) in snapshot['spans'].items():
+                stats = self.spans.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += count
+                stats[1] += total
+                stats[2] = max(stats[2], longest)
+            for name, value in snapshot['counters'].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def rows(self):
+        """One dict per span (slowest total first), then one per counter."""
+        snapshot = self.snapshot()
+        rows = [{'kind': 'span', 'name': name, 'count': count, 'total_s': round(total, 6),
+                 'mean_ms': round(total / count * 1000, 3), 'max_ms': round(longest * 1000, 3)}
+                for name, (count, total, longest) in snapshot['spans'].items()]
+        rows.sort(key=lambda r: r['total_s'], reverse=True)
+        rows += [{'kind': 'counter', 'name': name, 'count': value}
+                 for name, value in sorted(snapshot['counters'].items())]
+        return rows
+
+    def write_report(self, path):
+        """Writes the report as CSV if path ends in .csv, otherwise as JSON."""
+        rows = self.rows()
+        if path.endswith(".csv"):
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=['kind', 'name', 'count', 'total_s', 'mean_ms', 'max_ms'])
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            report = {'started': self.started, 'wall_s': round(time.time() - self.started, 6), 'rows': rows}
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+        return path
+
+    def print_summary(self, limit=15):
+        print(f"\n{'Span/Counter':<32} {'Count':>8} {'Total s':>10} {'Mean ms':>10} {'Max ms':>10}")
+        print("-" * 74)
+        for row in self.rows()[:limit]:
+            if row['kind'] == 'span':
+                print(f"{row['name']:<32} {row['count']:>8} {row['total_s']:>10.3f} "
+                      f"{row['mean_ms']:>10.2f} {row['max_ms']:>10.2f}")
+            else:
+                print(f"{row['name']:<32} {row['count']:>8}")
+
+# Process-wide recorder used by span()/timed()/incr()
+RECORDER = Recorder()
+
+@contextmanager
+def span(name):
+    """Times the enclosed block under `name`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        RECORDER.add_span(name, time.perf_counter() - started)
+
+def timed(name):
+    """Decorator form of span()."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def incr(name, value=1):
+    RECORDER.incr(name, value)
+
+def run_recorded(fn, *args, **kwargs):
+    """
+    Runs fn in a worker process and returns (result, spans/counters it recorded), so the
+    parent can merge them. Used by ScanExecutor for its process pool.
+    """
+    RECORDER.reset()
+    result = fn(*args, **kwargs)
+    return result, RECORDER.snapshot()
@@ -0,0 +1,103 @@
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from instrument_master import exchange_now
+
+# Longest date range Kite returns in one historical_data() request, per interval
+KITE_MAX_DAYS = {
+    "minute": 60,
+    "3minute": 100,
+    "5minute": 100,
+    "10minute": 100,
+    "15minute": 200,
+    "30minute": 200,
+    "60minute": 400,
+    "day": 2000,
+}
+SESSION_OPEN_MINUTES = 9 * 60 + 15  # NSE opens at 09:15, intraday bars are anchored there
+OHLCV_AGG = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum', 'oi': 'last'}
+
+def date_windows(from_date, to_date, interval="minute"):
+    """Splits [from_date, to_date] into consecutive windows Kite accepts in one request."""
+    step = timedelta(days=KITE_MAX_DAYS[interval])
+    windows = []
+    start = from_date
+    while start < to_date:
+        end = min(start + step, to_date)
+        windows.append((start, end))
+        start = end + timedelta(seconds=1)
+    return windows
+
+def _since(df, from_date):
+    """Bars at or after from_date (naive, exchange-local like Kite's request dates)."""
+    if df is None or df.empty:
+        return pd.DataFrame() if df is None else df
+    start = pd.Timestamp(from_date)
+    if df.index.tz is not None:
+        start = start.tz_localize(df.index.tz)
+    return df[df.index >= start]
+
+def fetch_history_chunked(kite, instrument_token, from_date, to_date, interval="minute",
+                          workers=4, cache=None, ticker=None):
+    """
+    Fetches a long historical range from Kite as concurrent window requests.
+    KiteDataManager.fetch_historical_data is rate-limited, so workers only overlap latency.
+    With a BarCache (keyed by ticker, default the token) only bars after the last cached
+    timestamp are fetched, and the merged series is stored. Offline, only the cache is read.
+    Returns the bars from from_date on. If any window fails, raises RuntimeError and caches
+    nothing, so the gap is fetched again on the next call instead of looking like holidays.
+    """
+    ticker = ticker or str(instrument_token)
+    start = from_date
+    if cache is not None:
+        last = cache.last_timestamp(ticker, interval)
+        if cache.offline or (last is not None and last >= pd.Timestamp(to_date, tz=last.tz)):
+            return _since(cache.load(ticker, interval), start)
+        if last is not None:
+            from_date = max(from_date, last.to_pydatetime().replace(tzinfo=None))
+
+    windows = date_windows(from_date, to_date, interval)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(kite.fetch_historical_data, instrument_token, w_start, w_end, interval,
+                               raise_errors=True) for w_start, w_end in windows]
+    failed = [(window, f.exception()) for window, f in zip(windows, futures) if f.exception() is not None]
+    if failed:
+        (w_start, w_end), error = failed[0]
+        raise RuntimeError(f"{len(failed)} of {len(windows)} {interval} windows for {ticker} failed "
+                           f"(first {w_start:%Y-%m-%d} to {w_end:%Y-%m-%d}: {error}); nothing was cached")
+
+    frames = [f.result() for f in futures]
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return _since(cache.load(ticker, interval) if cache is not None else None, start)
+    df = pd.concat(frames)
+    df = df[~df.index.duplicated(keep='last')].sort_index()
+
+    if cache is not None:
+        df = cache.append(ticker, interval, df)
+    return _since(df, start)
+
+def resample_bars(df, minutes):
+    """
+    Builds N-minute OHLCV bars from 1-minute bars, anchored to the 09:15 session open.
+    Empty bins (outside market hours) are dropped.
+    """
+    offset = SESSION_OPEN_MINUTES % minutes
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in df.columns}
+    bars = df.resample(f"{minutes}min", origin='start_day', offset=f"{offset}min",
+                       label='left', closed='left').agg(agg)
+    return bars.dropna(subset=['Close'])
+
+def load_intraday(kite, instrument_token, ticker, interval, days, workers=4, cache=None):
+    """
+    Intraday bars for `interval` (e.g. '5minute') over the last `days` days.
+    Only 1-minute bars are fetched and cached (chunked); other intervals are resampled from them.
+    With an offline BarCache the cached 1-minute bars are used and kite is not needed.
+    """
+    to_date = exchange_now()
+    from_date = to_date - timedelta(days=days)
+    minute_bars = fetch_history_chunked(kite, instrument_token, from_date, to_date, "minute",
+                                        workers=workers, cache=cache, ticker=ticker)
+    if interval == "minute" or minute_bars.empty:
+        return minute_bars
+    return resample_bars(minute_bars, int(interval.replace("minute", "")))
@@ -1,18 +1,53 @@
 import os
-import requests
+import time
+import threading
+import numpy as np
 import pandas as pd
-from kiteconnect import KiteConnect
+from instrument_master import InstrumentMaster, trading_day
+from instrumentation import span, incr
+
+QUOTE_BATCH_SIZE = 500  # kite.quote() accepts up to 500 instruments per request
+
+class TokenBucket:
+    """
+    Thread-safe token-bucket rate limiter: `rate` requests per second with bursts up to `capacity`.
+    acquire() blocks until a token is available.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
 
 class KiteDataManager:
     def __init__(self, api_key=None, api_secret=None):
         self.api_key = api_key or os.getenv('KITE_API_KEY')
         self.api_secret = api_secret or os.getenv('KITE_API_SECRET')
         self.access_token = os.getenv('KITE_ACCESS_TOKEN')
+        self.instrument_masters = {}
+        self._master_locks = {}  # exchange -> lock, so concurrent lookups download a dump only once
+        # Kite API limits: quotes 1 req/s, historical data 3 req/s
+        self.quote_limiter = TokenBucket(1)
+        self.historical_limiter = TokenBucket(3)
         
         if not self.api_key:
             print("Warning: KITE_API_KEY not found in environment.")
             return
             
+        from kiteconnect import KiteConnect  # Pulls in twisted for KiteTicker, so only load it when used
         self.kite = KiteConnect(api_key=self.api_key)
         
         if self.access_token:
@@ -34,13 +69,18 @@ class KiteDataManager:
             print(f"Error generating session: {e}")
             return None
 
-    def fetch_historical_data(self, instrument_token, from_date, to_date, interval="day"):
+    def fetch_historical_data(self, instrument_token, from_date, to_date, interval="day", raise_errors=False):
         """
         Fetches historical data from Kite.
         interval: minute, day, 3minute, 5minute...
+        A failed request returns an empty frame, or re-raises with raise_errors=True (so callers
+        can tell a failure from a range with no trading days).
         """
         try:
-            data = self.kite.historical_data(instrument_token, from_date, to_date, interval)
+            self.historical_limiter.acquire()
+            with span("network.kite.historical"):
+                data = self.kite.historical_data(instrument_token, from_date, to_date, interval)
+            incr("kite.historical.rows", len(data))
             df = pd.DataFrame(data)
             if not df.empty:
                 df.set_index("date", inplace=True)
@@ -48,55 +88,131 @@ class KiteDataManager:
             return df
         except Exception as e:
             print(f"Error fetching Kite data: {e}")
+            if raise_errors:
+                raise
             return pd.DataFrame()
 
     def get_quote(self, symbol):
         """Get real-time quote for a symbol (e.g., 'NSE:RELIANCE')"""
         try:
-            quote = self.kite.quote(symbol)
+            self.quote_limiter.acquire()
+            with span("network.kite.quote"):
+                quote = self.kite.quote(symbol)
             return quote[symbol]
         except Exception as e:
             print(f"Error fetching quote: {e}")
             return None
 
+    def get_quotes(self, symbols):
+        """
+        Batched quotes for many symbols (e.g. ['NFO:NIFTY24FEB22000CE', ...]).
+        Sends as few kite.quote() requests as the per-request limit allows, paced by the rate limiter.
+        Returns a dict symbol -> quote (symbols that failed are missing).
+        """
+        quotes = {}
+        symbols = list(dict.fromkeys(symbols))
+        for i in range(0, len(symbols), QUOTE_BATCH_SIZE):
+            batch = symbols[i:i + QUOTE_BATCH_SIZE]
+            try:
+                self.quote_limiter.acquire()
+                with span("network.kite.quote"):
+                    quotes.update(self.kite.quote(batch))
+                incr("kite.quote.instruments", len(batch))
+            except Exception as e:
+                print(f"Error fetching quotes: {e}")
+        return quotes
+
+    def get_option_ladder(self, underlyings, n_strikes=5, expiry=None):
+        """
+        Quotes the strike ladder (ATM +/- n_strikes, CE and PE legs) for several underlyings at once.
+        underlyings: dict name -> spot price, e.g. {'NIFTY': 22010, 'BANKNIFTY': 47250}
+        Returns a single DataFrame with one row per option leg.
+        """
+        master = self.get_instrument_master("NFO")
+        legs = []
+        for name, spot in underlyings.items():
+            leg_expiry = expiry or master.nearest_expiry(name)
+            strikes = master.strike_ladder(name, leg_expiry)
+            if not len(strikes):
+                print(f"No options listed for {name}")
+                continue
+                
+            # Nearest listed strike to spot (lower strike on ties)
+            i = int(np.searchsorted(strikes, spot))
+            if i > 0 and (i == len(strikes) or spot - strikes[i - 1] <= strikes[i] - spot):
+                i -= 1
+            atm = strikes[i]
+            for strike in strikes[max(0, i - n_strikes):i + n_strikes + 1]:
+                for opt_type in ("CE", "PE"):
+                    option = master.option(name, strike, opt_type, leg_expiry)
+                    if option:
+                        legs.append((name, leg_expiry, strike, opt_type, strike == atm, option['tradingsymbol']))
+                        
+        quotes = self.get_quotes([f"NFO:{leg[-1]}" for leg in legs])
+        
+        rows = []
+        for name, leg_expiry, strike, opt_type, is_atm, tradingsymbol in legs:
+            quote = quotes.get(f"NFO:{tradingsymbol}")
+            if not quote:
+                continue
+            depth = quote.get('depth', {})
+            bids, asks = depth.get('buy') or [{}], depth.get('sell') or [{}]
+            rows.append({
+                'Underlying': name,
+                'Expiry': leg_expiry,
+                'Strike': strike,
+                'Type': opt_type,
+                'ATM': is_atm,
+                'Symbol': tradingsymbol,
+                'LTP': quote.get('last_price'),
+                'OI': quote.get('oi'),
+                'Volume': quote.get('volume'),
+                'Bid': bids[0].get('price'),
+                'Ask': asks[0].get('price')
+            })
+        return pd.DataFrame(rows)
+
     def get_instruments(self, exchange="NFO"):
         """Get list of instruments to find tokens"""
         try:
-            return self.kite.instruments(exchange)
+            with span("network.kite.instruments"):
+                return self.kite.instruments(exchange)
         except Exception as e:
             print(f"Error fetching instruments: {e}")
             return []
 
+    def get_instrument_master(self, exchange="NFO"):
+        """
+        Instrument master for an exchange, loaded once per trading day (disk-cached).
+        Threads asking for the same exchange while it loads wait for that load instead of starting their own.
+        """
+        master = self.instrument_masters.get(exchange)
+        if master is not None and master.loaded and master.day == trading_day():
+            return master
+        with self._master_locks.setdefault(exchange, threading.Lock()):
+            master = self.instrument_masters.get(exchange)
+            if master is None or not master.loaded or master.day != trading_day():
+                master = InstrumentMaster(self.get_instruments, exchange).load()
+                self.instrument_masters[exchange] = master
+        return master
+
     def get_option_quote(self, symbol, strike, type="CE", expiry=None):
         """
         Finds the option symbol and fetches quote.
         symbol: NIFTY, BANKNIFTY
         strike: 22000
         type: CE or PE
+        expiry: datetime.date, defaults to the nearest expiry
         """
-        # 1. Fetch all NFO instruments
-        instruments = self.get_instruments("NFO")
-        if not instruments: return None
-        
-        # 2. Filter for symbol and strike
-        # Note: Kite instruments are a list of dicts.
-        # We need to find the nearest expiry if not provided.
-        
-        candidates = [
-            i for i in instruments 
-            if i['name'] == symbol and i['strike'] == float(strike) and i['instrument_type'] == type
-        ]
-        
-        if not candidates:
+        # Indexed lookup in the cached NFO instrument master
+        option = self.get_instrument_master("NFO").option(symbol, strike, type, expiry)
+        if option is None:
             print(f"No option found for {symbol} {strike} {type}")
             return None
             
-        # Sort by expiry to get the nearest one (current month)
-        candidates.sort(key=lambda x: x['expiry'])
-        nearest_option = candidates[0]
-        tradingsymbol = nearest_option['tradingsymbol']
+        tradingsymbol = option['tradingsymbol']
         
-        # 3. Get Quote
+        # Get Quote
         quote = self.get_quote(f"NFO:{tradingsymbol}")
         if quote:
             return {
@@ -0,0 +1,234 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from data_processor import StreamingIndicators
+from inference import InferenceService
+from instrument_master import exchange_now
+
+class RingBarBuilder:
+    """
+    Aggregates ticks for one instrument into fixed-interval OHLCV bars.
+    Closed bars are kept in a fixed-size ring buffer (the last `capacity` bars).
+    """
+    FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+    def __init__(self, interval_seconds=60, capacity=500):
+        self.interval = np.timedelta64(interval_seconds, 's')
+        self.capacity = capacity
+        self.values = np.full((capacity, len(self.FIELDS)), np.nan)
+        self.times = np.zeros(capacity, dtype='datetime64[s]')
+        self.count = 0  # Bars closed so far
+        self.bucket = None  # Start time of the bar being built
+        self.current = None  # [open, high, low, close, volume] of the bar being built
+        self.last_volume = None  # Kite sends cumulative day volume per tick
+
+    def add_tick(self, price, timestamp, cumulative_volume=None):
+        """Adds one tick. Returns the bar it closed as (start_time, ohlcv array), or None."""
+        ts = np.datetime64(pd.Timestamp(timestamp).tz_localize(None), 's')
+        bucket = ts - (ts - np.datetime64(0, 's')) % self.interval
+        volume = 0.0
+        if cumulative_volume is not None:
+            if self.last_volume is not None:
+                volume = max(cumulative_volume - self.last_volume, 0)
+            self.last_volume = cumulative_volume
+
+        closed = None
+        if self.bucket is not None and bucket > self.bucket:
+            closed = self._close()
+        if self.current is None:
+            self.bucket = bucket
+            self.current = [price, price, price, price, volume]
+        else:
+            cur = self.current
+            cur[1] = max(cur[1], price)
+            cur[2] = min(cur[2], price)
+            cur[3] = price
+            cur[4] += volume
+        return closed
+
+    def flush(self, now):
+        """Closes the current bar if its interval has ended by `now` (for quiet instruments)."""
+        if self.current is None:
+            return None
+        now = np.datetime64(pd.Timestamp(now).tz_localize(None), 's')
+        if now >= self.bucket + self.interval:
+            return self._close()
+        return None
+
+    def _close(self):
+        slot = self.count % self.capacity
+        self.values[slot] = self.current
+        self.times[slot] = self.bucket
+        self.count += 1
+        bar = (self.bucket, self.values[slot].copy())
+        self.current = None
+        self.bucket = None
+        return bar
+
+    def bars(self):
+        """Closed bars in the ring buffer, oldest first, as a DataFrame."""
+        n = min(self.count, self.capacity)
+        order = (np.arange(n) + self.count - n) % self.capacity
+        return pd.DataFrame(self.values[order], index=pd.DatetimeIndex(self.times[order]), columns=self.FIELDS)
+
+class LiveSignalEngine:
+    """
+    Turns ticks into model signals: ticks -> ring-buffered bars -> incremental indicators ->
+    already-fitted StockPredictor, scored once per instrument on every bar close.
+    Bars closed within one tick batch are scored together through an InferenceService.
+    callback(ticker, bar_time, close, probability, latency_ms) receives each signal.
+    on_ticks() (KiteTicker's thread) and flush() (the main thread) are serialised by a lock,
+    since both update the bar builders and the pending inference batch.
+    """
+    def __init__(self, feature_cols, interval_seconds=60, capacity=500, callback=None, use_numpy=True):
+        self.feature_cols = feature_cols
+        self.interval_seconds = interval_seconds
+        self.capacity = capacity
+        self.callback = callback or self.print_signal
+        self.instruments = {}  # token -> dict(ticker, predictor, builder, indicators)
+        self.inference = InferenceService(use_numpy=use_numpy)
+        self._closed = []  # (token, bar_time, close, started) awaiting scoring
+        self._lock = threading.Lock()
+
+    def add_instrument(self, token, ticker, predictor, history_closes=None):
+        """
+        Registers an instrument. history_closes (the bars the model was trained on, same interval)
+        warm up the indicator state so live features match add_indicators().
+        """
+        indicators = StreamingIndicators()
+        if history_closes is not None:
+            for close in np.asarray(history_closes, dtype=float):
+                indicators.update(close)
+        self.instruments[token] = {
+            'ticker': ticker,
+            'predictor': predictor,
+            'builder': RingBarBuilder(self.interval_seconds, self.capacity),
+            'indicators': indicators,
+        }
+        self.inference.register(token, predictor, ticker=ticker)
+
+    def on_ticks(self, ticks):
+        """Kite tick callback: list of tick dicts (instrument_token, last_price, ...)."""
+        with self._lock:
+            for tick in ticks:
+                inst = self.instruments.get(tick['instrument_token'])
+                if inst is None:
+                    continue
+                timestamp = tick.get('exchange_timestamp') or tick.get('last_trade_time') or exchange_now()
+                bar = inst['builder'].add_tick(tick['last_price'], timestamp, tick.get('volume_traded'))
+                if bar is not None:
+                    self._on_bar(tick['instrument_token'], inst, *bar)
+            self._score_closed()
+
+    def flush(self, now=None):
+        """
+        Closes bars whose interval has ended, for instruments that have gone quiet.
+        now defaults to the current exchange time (IST), the clock bar times are on.
+        """
+        now = now or exchange_now()
+        with self._lock:
+            for token, inst in self.instruments.items():
+                bar = inst['builder'].flush(now)
+                if bar is not None:
+                    self._on_bar(token, inst, *bar)
+            self._score_closed()
+
+    def _on_bar(self, token, inst, bar_time, ohlcv):
+        started = time.perf_counter()
+        values = inst['indicators'].update(ohlcv[3])
+        if not inst['indicators'].ready:
+            return
+        self.inference.submit(token, [values[col] for col in self.feature_cols])
+        self._closed.append((token, bar_time, ohlcv[3], started))
+
+    def _score_closed(self):
+        if not self._closed:
+            return
+        closed, self._closed = self._closed, []
+        probabilities = self.inference.flush()
+        finished = time.perf_counter()
+        for token, bar_time, close, started in closed:
+            latency_ms = (finished - started) * 1000
+            self.callback(self.instruments[token]['ticker'], pd.Timestamp(bar_time), close,
+                          probabilities[token], latency_ms)
+
+    @staticmethod
+    def print_signal(ticker, bar_time, close, probability, latency_ms):
+        sentiment = "NEUTRAL"
+        if probability > 0.6: sentiment = "BULLISH"
+        elif probability < 0.4: sentiment = "BEARISH"
+        print(f"[{bar_time}] {ticker:<15} Close: {close:<10.2f} Bullish: {probability:<8.2%} "
+              f"{sentiment:<8} ({latency_ms:.2f} ms)")
+
+class KiteTickerSource:
+    """Live ticks from the Kite WebSocket (KiteTicker), in full mode."""
+    def __init__(self, api_key, access_token):
+        self.api_key = api_key
+        self.access_token = access_token
+
+    def run(self, tokens, on_ticks, on_idle=None):
+        from kiteconnect import KiteTicker
+        kws = KiteTicker(self.api_key, self.access_token)
+        tokens = list(tokens)
+
+        def on_connect(ws, response):
+            ws.subscribe(tokens)
+            ws.set_mode(ws.MODE_FULL, tokens)
+
+        kws.on_ticks = lambda ws, ticks: on_ticks(ticks)
+        kws.on_connect = on_connect
+        kws.connect(threaded=True)
+        try:
+            while True:
+                time.sleep(1)
+                if on_idle:
+                    on_idle()
+        except KeyboardInterrupt:
+            kws.close()
+
+class ReplayTickSource:
+    """
+    Stand-in for KiteTickerSource that replays recorded ticks (list of dicts, DataFrame or CSV path
+    with instrument_token, last_price, exchange_timestamp and optionally volume_traded columns).
+    speed=None replays as fast as possible; speed=1.0 keeps real time.
+    """
+    def __init__(self, ticks, speed=None):
+        if isinstance(ticks, str):
+            ticks = pd.read_csv(ticks, parse_dates=['exchange_timestamp'])
+        if isinstance(ticks, pd.DataFrame):
+            ticks = ticks.to_dict('records')
+        self.ticks = ticks
+        self.speed = speed
+
+    def warmup_bars(self, token, interval_seconds, n_bars=2000, seed=0):
+        """
+        Synthetic OHLCV history for token (GBM, see synthetic_data.gbm_ohlcv): n_bars bars of
+        interval_seconds ending just before its first replayed tick and rescaled to that tick's price.
+        Lets a replay fit a model and warm up indicators when no recorded bars are available.
+        Returns None if token has no ticks.
+        """
+        from synthetic_data import gbm_ohlcv
+        first = next((tick for tick in self.ticks if tick['instrument_token'] == token), None)
+        if first is None:
+            return None
+        minutes = interval_seconds / 60
+        bars = gbm_ohlcv(n_bars, freq="minute", sigma=0.20 * np.sqrt(minutes), seed=seed)
+        bars[['Open', 'High', 'Low', 'Close']] *= first['last_price'] / bars['Close'].iloc[-1]
+        interval = pd.Timedelta(seconds=interval_seconds)
+        end = pd.Timestamp(first['exchange_timestamp']).tz_localize(None).floor(interval)
+        return bars.set_axis(end - interval * np.arange(n_bars, 0, -1))
+
+    def run(self, tokens, on_ticks, on_idle=None):
+        tokens = set(tokens)
+        previous = None
+        for tick in self.ticks:
+            if tick['instrument_token'] not in tokens:
+                continue
+            ts = pd.Timestamp(tick['exchange_timestamp'])
+            if self.speed and previous is not None:
+                time.sleep(max((ts - previous).total_seconds(), 0) / self.speed)
+            previous = ts
+            on_ticks([tick])
+        if on_idle and previous is not None:
+            on_idle(previous + pd.Timedelta(days=1))
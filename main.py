@@ -1,67 +1,62 @@
-import pandas as pd
-import numpy as np
 import argparse
-from data_processor import fetch_data, add_indicators
-from model import StockPredictor
-from backtester import Backtester
-from nse_scraper import NSEScraper
-from kite_manager import KiteDataManager
+import cProfile
+from datetime import timedelta
+from functools import partial
+from features import feature_columns
+from instrumentation import RECORDER
 
-def suggest_option_chain(ticker, prediction, current_price, kite=None):
+# pandas, sklearn, yfinance, kiteconnect, curl_cffi, pyarrow and matplotlib are imported inside the
+# functions that need them, so short-lived runs only pay for the code path they take.
+
+FEATURE_COLS = feature_columns('price')
+OPTION_FEATURE_COLS = feature_columns('price', 'options')
+MIN_BARS = 200
+SNAPSHOT_MAX_AGE = timedelta(minutes=15)  # Older chain snapshots are not joined onto a bar
+DAY_CLOSE = timedelta(hours=15, minutes=30)  # Daily bars are labelled at midnight, NSE closes at 15:30
+
+LIVE_INTERVAL_SECONDS = {"minute": 60, "3minute": 180, "5minute": 300, "15minute": 900, "60minute": 3600}
+TRADING_DAYS = 252
+SESSION_MINUTES = 375  # NSE session, 09:15 to 15:30
+
+def periods_per_year(interval="day"):
+    """Bars per year at a bar interval, for annualising volatility ('5minute' -> 252 * 75)."""
+    if interval == "day":
+        return TRADING_DAYS
+    minutes = int(interval.replace("minute", "") or 1)
+    return TRADING_DAYS * -(-SESSION_MINUTES // minutes)  # A short last bar still counts
+
+def build_market_data(kite=None, cache=None, chain_store=None):
+    """Market data routed through the default sources (static tokens, Kite, NSE, yfinance, estimate)."""
+    from data_sources import MarketData, default_sources
+    return MarketData(default_sources(kite, cache, chain_store))
+
+def nse_symbol(ticker):
+    """Yahoo ticker -> NSE option-chain symbol ('^NSEI' -> 'NIFTY', 'SBIN.NS' -> 'SBIN')."""
+    symbol = ticker.replace('.NS', '').replace('^', '').replace('NSEI', 'NIFTY').replace('NSEBANK', 'BANKNIFTY')
+    return 'NIFTY' if symbol == 'NIFTY50' else symbol
+
+def suggest_option_chain(ticker, prediction, current_price, data, volatility=None):
     """
     Suggests an option strike based on prediction and Live Data.
+    ATM premiums come from the first source that has them (Kite, then the NSE chain, then a
+    Black-Scholes estimate at `volatility`, annualised).
     """
     sentiment = "NEUTRAL"
     suggestion = "WAIT"
-    atm_strike = round(current_price / 50) * 50 # ATM approximation (Nifty is 50, BankNifty 100)
-    if 'BANK' in ticker: atm_strike = round(current_price / 100) * 100
-    
-    nse_symbol = ticker.replace('.NS', '').replace('^', '').replace('NSEI', 'NIFTY').replace('NSEBANK', 'BANKNIFTY')
-    if nse_symbol == 'NIFTY50': nse_symbol = 'NIFTY'
+    strike_step = 100 if 'BANK' in ticker else 50 # Nifty is 50, BankNifty 100
     
-    ce_price = 0
-    pe_price = 0
-    source = "Estimation"
+    symbol = nse_symbol(ticker)
     
-    # 1. Try Kite (Best)
-    if kite and kite.access_token:
-        print(f"Fetching Option Prices from Kite for {nse_symbol} {atm_strike}...")
-        ce_quote = kite.get_option_quote(nse_symbol, atm_strike, "CE")
-        pe_quote = kite.get_option_quote(nse_symbol, atm_strike, "PE")
-        
-        if ce_quote: ce_price = ce_quote['price']
-        if pe_quote: pe_price = pe_quote['price']
-        source = "Kite API"
-        
-    # 2. Try NSE Scraper (Fallback)
-    if ce_price == 0:
-        scraper = NSEScraper()
-        print(f"Fetching Live Option Chain for {nse_symbol} (Scraper)...")
-        chain_data = scraper.fetch_option_chain(nse_symbol)
-        
-        if chain_data:
-            real_atm = scraper.get_atm_strike(chain_data, current_price)
-            df_chain = scraper.parse_chain(chain_data)
-            if not df_chain.empty and real_atm:
-                row = df_chain[df_chain['Strike'] == real_atm]
-                if not row.empty:
-                    ce_price = row.iloc[0]['CE_LTP']
-                    pe_price = row.iloc[0]['PE_LTP']
-                    atm_strike = real_atm
-                    source = "NSE Live"
-
-    # 3. Fallback to Estimation
-    if ce_price == 0:
-        ce_price = current_price * 0.005 # ~0.5% premium estimate
-        pe_price = current_price * 0.005
-        source = "Estimated (Data Unavailable)"
+    quote = data.get("atm_options", symbol=symbol, spot=float(current_price),
+                     strike_step=strike_step, volatility=volatility)
+    atm_strike, ce_price, pe_price, source = quote['Strike'], quote['CE'], quote['PE'], quote['Source']
 
     if prediction > 0.6:
         sentiment = "BULLISH"
-        suggestion = f"BUY {nse_symbol} {atm_strike} CE @ ~₹{ce_price:.2f} (Target: +30%, SL: -15%)"
+        suggestion = f"BUY {symbol} {atm_strike} CE @ ~₹{ce_price:.2f} (Target: +30%, SL: -15%)"
     elif prediction < 0.4:
         sentiment = "BEARISH"
-        suggestion = f"BUY {nse_symbol} {atm_strike} PE @ ~₹{pe_price:.2f} (Target: +30%, SL: -15%)"
+        suggestion = f"BUY {symbol} {atm_strike} PE @ ~₹{pe_price:.2f} (Target: +30%, SL: -15%)"
         
     print(f"\n--- AI SUGGESTION FOR {ticker} ---")
     print(f"Current Spot Price: {current_price:.2f}")
@@ -71,64 +66,36 @@ def suggest_option_chain(ticker, prediction, current_price, kite=None):
     print(f"Action: {suggestion}")
     print("-" * 30)
 
-def analyze_ticker(ticker, kite=None):
+def load_ticker_data(ticker, data, interval="day", days=3650):
     """
-    Runs the full analysis pipeline for a single ticker.
-    Returns a dict of results.
+    Downloads the price history for a single ticker (I/O stage of the pipeline).
+    With Kite, long ranges are fetched in chunks and intraday intervals are built from 1-minute bars;
+    otherwise (or if Kite has nothing) daily bars come from yfinance. Intraday bars need Kite, or
+    1-minute bars it cached earlier (which --offline serves without a session).
+    Returns a DataFrame, or None if there is not enough data.
     """
     print(f"\n{'='*40}")
     print(f"ANALYZING: {ticker}")
     print(f"{'='*40}")
     
-    # 1. Fetch Data
-    df = None
-    if kite and kite.access_token:
-        # Kite logic (simplified for single ticker flow)
-        token_map = {'^NSEI': 256265, '^NSEBANK': 260105}
-        inst_token = token_map.get(ticker)
-        if inst_token:
-            from datetime import datetime, timedelta
-            to_date = datetime.now()
-            from_date = to_date - timedelta(days=3650) # 10 years
-            df = kite.fetch_historical_data(inst_token, from_date, to_date)
-            
-    if df is None or df.empty:
-        try:
-            df = fetch_data(ticker)
-        except Exception as e:
-            print(f"Skipping {ticker}: {e}")
-            return None
-
-    if len(df) < 200:
+    df = data.get("history", ticker=ticker, interval=interval, days=days)
+    if df is None:
+        hint = "" if interval == "day" else " (intraday bars need a Kite session, --kite, or cached Kite bars)"
+        print(f"Skipping {ticker}: no {interval} price data from any source{hint}")
+        return None
+
+    if len(df) < MIN_BARS:
         print(f"Not enough data for {ticker}")
         return None
+        
+    return df
 
-    # 2. Add Indicators
-    df = add_indicators(df)
+def summarize_prediction(ticker, df, prediction, accuracy, interval="day"):
+    """Result dict for a scored ticker (df with indicators, bars of `interval`)."""
+    from data_processor import historical_volatility
 
-    # 3. Prepare Data
-    feature_cols = ['RSI', 'MACD', 'MACD_SIGNAL', 'BB_UPPER', 'BB_LOWER', 'EMA_50', 'EMA_200']
-    predictor = StockPredictor()
-    X, y, scaler = predictor.prepare_data(df, feature_cols)
-    
-    # Split
-    split = int(len(X) * 0.8)
-    X_train, X_test = X[:split], X[split:]
-    y_train, y_test = y[:split], y[split:]
-    
-    # 4. Train
-    # print("Training Model...")
-    predictor.build_model()
-    predictor.train(X_train, y_train)
-    
-    # 5. Predict Next Move
-    accuracy = predictor.model.score(X_test, y_test)
-    
-    last_row = df.iloc[[-1]][feature_cols].values
-    last_row_scaled = scaler.transform(last_row)
-    prediction = predictor.predict(last_row_scaled)[0]
-    
     current_price = df['Close'].iloc[-1]
+    volatility = historical_volatility(df['Close'], periods_per_year=periods_per_year(interval)).iloc[-1]
     
     # 6. Suggestion Logic (Silent return)
     sentiment = "NEUTRAL"
@@ -140,24 +107,251 @@ def analyze_ticker(ticker, kite=None):
         "Price": current_price,
         "Sentiment": sentiment,
         "Confidence": prediction,
-        "Accuracy": accuracy
+        "Accuracy": accuracy,
+        "Volatility": volatility
     }
 
-def main():
-    parser = argparse.ArgumentParser(description="NSE Options ML Predictor")
-    parser.add_argument("--ticker", type=str, default="^NSEI", help="Ticker symbol")
-    parser.add_argument("--scan_nifty", action="store_true", help="Scan all Nifty 50 stocks")
-    parser.add_argument("--kite", action="store_true", help="Use Kite Connect")
-    parser.add_argument("--token", type=str, help="Kite Request Token")
-    args = parser.parse_args()
+def bar_close_offset(interval="day"):
+    """Time from a bar's label to its close (daily bars are labelled at midnight)."""
+    return DAY_CLOSE if interval == "day" else timedelta(seconds=LIVE_INTERVAL_SECONDS[interval])
+
+def join_option_features(ticker, df, chain_store, interval="day"):
+    """
+    Adds features from stored option-chain snapshots to df (with indicators); each bar sees the last
+    snapshot taken before it closed. Returns (df, feature_cols), keeping the price features and all
+    bars when fewer than MIN_BARS bars have a snapshot.
+    """
+    from option_features import add_stored_option_features
+
+    close_offset = bar_close_offset(interval)
+    joined = add_stored_option_features(df.copy(), chain_store, nse_symbol(ticker), lag=close_offset,
+                                        tolerance=max(close_offset, SNAPSHOT_MAX_AGE)).dropna()
+    if len(joined) < MIN_BARS:
+        print(f"Only {len(joined)} bars of {ticker} have option-chain snapshots, using price features only")
+        return df, FEATURE_COLS
+    print(f"Using option-chain features on the last {len(joined)} bars of {ticker}")
+    return joined, OPTION_FEATURE_COLS
+
+def stored_volatility(ticker, df, chain_store, interval="day"):
+    """
+    Per-bar volatility for Backtester.run_options(): the ATM IV of the last stored chain snapshot
+    before each bar closed (see ChainSnapshotStore.atm_iv()), and historical volatility on bars
+    without a recent snapshot. Returns None if no bar of df has a snapshot.
+    """
+    import pandas as pd
+    from data_processor import historical_volatility
+    from option_features import align_to_bars
+
+    close_offset = bar_close_offset(interval)
+    tolerance = max(close_offset, SNAPSHOT_MAX_AGE)
+    times = pd.DatetimeIndex(df.index).tz_localize(None)
+    iv = chain_store.atm_iv(nse_symbol(ticker), times[0] + close_offset - tolerance, times[-1] + close_offset)
+    if iv.empty:
+        return None
+    stored = align_to_bars(iv.to_frame('ATM_IV'), df.index, lag=close_offset, tolerance=tolerance)['ATM_IV']
+    if stored.isna().all():
+        return None
+    print(f"Pricing options with stored ATM IV on {stored.notna().sum()} of {len(df)} bars")
+    return stored.fillna(historical_volatility(df['Close'], periods_per_year=periods_per_year(interval)))
+
+def score_ticker(ticker, df, registry=None, pooled=False, chain_store=None, interval="day", backtest=False,
+                 return_predictor=False):
+    """
+    Runs indicators, model fit and scoring on downloaded data (CPU stage of the pipeline).
+    With a ModelRegistry the stored model is reused or warm-started instead of refitted.
+    With pooled=True the stored universe model scores the ticker, if there is one.
+    With a ChainSnapshotStore the model also gets option-chain features (see join_option_features()).
+    With backtest=True the per-ticker model is also backtested on its test slice ('Backtest' in the results).
+    Returns a dict of results, or (results, fitted predictor) with return_predictor=True.
+    """
+    from data_processor import add_indicators
+    from model import StockPredictor
+
+    # 2. Add Indicators
+    df = add_indicators(df)
+
+    if pooled and registry is not None:
+        predictor, _ = registry.load_pooled(FEATURE_COLS, interval)
+        if predictor is not None:
+            prediction, accuracy = predictor.score(ticker, df)
+            result = summarize_prediction(ticker, df, prediction, accuracy, interval)
+            return (result, predictor) if return_predictor else result
+        print("No pooled model saved yet (run --scan_nifty --pooled first), fitting a per-ticker model")
+
+    # 3. Prepare Data
+    feature_cols = FEATURE_COLS
+    if chain_store is not None:
+        df, feature_cols = join_option_features(ticker, df, chain_store, interval)
+    split = int(len(df) * 0.8)
     
+    # 4. Train
+    if registry is not None:
+        predictor, X, y = registry.fit(ticker, df, feature_cols, split, interval)
+    else:
+        predictor = StockPredictor()
+        X, y, _ = predictor.prepare_data(df, feature_cols, train_rows=split)
+        predictor.build_model()
+        predictor.train(X[:split], y[:split])
+    X_test, y_test = X[split:], y[split:]
+    
+    # 5. Predict Next Move
+    accuracy = predictor.model.score(X_test, y_test)
+    
+    # X is already scaled, so the last row can be scored directly
+    prediction = predictor.predict(X[-1:])[0]
+    
+    result = summarize_prediction(ticker, df, prediction, accuracy, interval)
+    if backtest:
+        from backtester import Backtester
+        # Only the bars the model was not fitted on
+        result['Backtest'], _, _ = Backtester(df.iloc[split:], predictor.predict(X_test)).run()
+    return (result, predictor) if return_predictor else result
+
+def scan_pooled(tickers, fetch_fn, registry=None, io_workers=8, interval="day"):
+    """
+    Pooled scan: downloads every ticker, fits one PooledPredictor across the whole universe
+    (a single fit however many tickers) and scores all latest bars in one batch.
+    Returns a list of result dicts.
+    """
+    from data_processor import add_indicators
+    from pooled import PooledPredictor
+    from scanner import ScanExecutor
+
+    downloaded = ScanExecutor(fetch_fn, None, io_workers=io_workers).fetch_all(tickers)
+    frames = {ticker: add_indicators(df) for ticker, df in downloaded.items()}
+    if not frames:
+        return []
+    pooled = PooledPredictor(FEATURE_COLS)
+    print(f"\nFitting pooled model on {len(frames)} tickers...")
+    tensor = pooled.fit_universe(frames)
+    if registry is not None:
+        registry.save_pooled(pooled, tensor.tickers, interval)
+    scores = pooled.score_universe(tensor)
+    return [summarize_prediction(row.Ticker, frames[row.Ticker], row.Confidence, row.Accuracy, interval)
+            for row in scores.itertuples()]
+
+def analyze_ticker(ticker, data, registry=None, interval="day", days=3650, pooled=False, chain_store=None):
+    """
+    Runs the full analysis pipeline for a single ticker.
+    Returns a dict of results.
+    """
+    # 1. Fetch Data
+    df = load_ticker_data(ticker, data, interval=interval, days=days)
+    if df is None:
+        return None
+    return score_ticker(ticker, df, registry=registry, pooled=pooled, chain_store=chain_store, interval=interval)
+
+def run_live(tickers, data, kite=None, registry=None, interval="minute", days=30, replay=None):
+    """
+    Live mode: fits (or loads) each ticker's model, warms up incremental indicators on its history,
+    then scores every closed bar from the Kite tick stream (or a recorded replay).
+    """
+    from live import LiveSignalEngine, KiteTickerSource, ReplayTickSource
+
+    if interval not in LIVE_INTERVAL_SECONDS:
+        print(f"Live mode needs an intraday --interval, one of: {', '.join(LIVE_INTERVAL_SECONDS)}")
+        return
+    if replay is None and not (kite and kite.access_token):
+        print("Live mode needs a Kite session (--kite) or a --replay file.")
+        return
+
+    source = ReplayTickSource(replay) if replay else KiteTickerSource(kite.api_key, kite.access_token)
+    engine = LiveSignalEngine(FEATURE_COLS, LIVE_INTERVAL_SECONDS[interval])
+    for ticker in tickers:
+        token = data.get("instrument_token", ticker=ticker)
+        if token is None:
+            print(f"Skipping {ticker}: no instrument token")
+            continue
+        df = load_ticker_data(ticker, data, interval=interval, days=days)
+        ticker_registry = registry
+        if df is None and replay:
+            df = source.warmup_bars(token, LIVE_INTERVAL_SECONDS[interval])
+            if df is None:
+                continue
+            print(f"Warming up {ticker} on {len(df)} synthetic {interval} bars for the replay "
+                  f"(use --offline with cached Kite bars for real history)")
+            ticker_registry = None  # Never store a model fitted on synthetic bars
+        if df is None:
+            continue
+        # add_indicators() modifies its input, keep the raw closes for the warm-up
+        # (the predictor fitted here is used directly; reloading it fails under --retrain)
+        _, predictor = score_ticker(ticker, df.copy(), registry=ticker_registry, interval=interval,
+                                    return_predictor=True)
+        engine.add_instrument(token, ticker, predictor, df['Close'])
+
+    if not engine.instruments:
+        print("No instruments to stream.")
+        return
+
+    print(f"\nStreaming {len(engine.instruments)} instruments ({interval} bars)...")
+    source.run(engine.instruments.keys(), engine.on_ticks, on_idle=engine.flush)
+
+def run_poller(symbols, chain_store, interval=5.0, iterations=None):
+    """
+    Polls the NSE option chains of symbols every `interval` seconds and stores each snapshot in
+    chain_store, until Ctrl+C or `iterations` snapshots. Builds the history --option_features trains on.
+    """
+    import asyncio
+    from nse_poller import NSEPoller
+
+    poller = NSEPoller(symbols, interval=interval)
+    print(f"Polling {', '.join(symbols)} option chains every {interval:g}s into {chain_store.root} (Ctrl+C to stop)...")
+    try:
+        asyncio.run(poller.run(chain_store.append_snapshot, iterations))
+    except KeyboardInterrupt:
+        print("Stopped polling.")
+
+def run(args):
+    """Runs the mode selected on the command line."""
+    from bar_cache import BarCache
+    from model_registry import ModelRegistry
+
     kite_manager = None
     if args.kite:
+        from kite_manager import KiteDataManager
         kite_manager = KiteDataManager()
         if args.token:
             kite_manager.generate_session(args.token)
+            
+    bar_cache = None
+    if not args.no_cache:
+        bar_cache = BarCache(args.cache_dir, offline=args.offline)
+    registry = ModelRegistry(args.model_dir, retrain=args.retrain)
+    chain_store = None
+    if args.store_chains or args.option_features or args.poll_chains or args.option_backtest:
+        from chain_store import ChainSnapshotStore
+        chain_store = ChainSnapshotStore()
+    data = build_market_data(kite_manager, bar_cache, chain_store if args.store_chains else None)
+    renderer = None
+    if args.charts_dir:
+        from reporting import ReportRenderer
+        renderer = ReportRenderer(args.charts_dir, workers=args.chart_workers)
 
-    if args.scan_nifty:
+    try:
+        if args.poll_chains:
+            run_poller(args.poll_chains.split(','), chain_store, args.poll_interval, args.poll_count)
+        else:
+            run_mode(args, data, kite_manager, registry, chain_store, renderer)
+    finally:
+        if chain_store is not None:
+            chain_store.close()
+        if renderer is not None:
+            renderer.close()
+            print(f"Backtest charts and summary.html/summary.csv written to {args.charts_dir}")
+        if args.report:
+            data.print_stats()
+
+def run_mode(args, data, kite_manager, registry, chain_store=None, renderer=None):
+    """
+    Live, scan or single-ticker mode, with every price/chain request going through `data`.
+    chain_store, if given, supplies option-chain features in single-ticker mode (with --option_features)
+    and the ATM IV the walk-forward option backtest is priced with, where snapshots cover its bars.
+    renderer, if given (a ReportRenderer), receives per-ticker backtest charts in the background.
+    """
+    if args.live:
+        run_live(args.ticker.split(','), data, kite=kite_manager, registry=registry,
+                 interval=args.interval, days=args.days, replay=args.replay)
+    elif args.scan_nifty:
         # Top 10-15 weights in Nifty 50 for demo (Scanning 50 takes time)
         nifty_50 = [
             "RELIANCE.NS", "HDFCBANK.NS", "ICICIBANK.NS", "INFY.NS", "ITC.NS",
@@ -165,10 +359,21 @@ def main():
             "BHARTIARTL.NS", "BAJFINANCE.NS", "ASIANPAINT.NS", "MARUTI.NS", "TITAN.NS"
         ]
         
-        results = []
-        for stock in nifty_50:
-            res = analyze_ticker(stock, kite=kite_manager)
-            if res: results.append(res)
+        fetch_fn = partial(load_ticker_data, data=data, interval=args.interval, days=args.days)
+        if args.pooled:
+            results = scan_pooled(nifty_50, fetch_fn, registry=registry, io_workers=args.io_workers,
+                                  interval=args.interval)
+        else:
+            from scanner import ScanExecutor
+            executor = ScanExecutor(fetch_fn, partial(score_ticker, registry=registry, interval=args.interval,
+                                                      backtest=renderer is not None),
+                                    workers=args.workers, io_workers=args.io_workers)
+            results = []
+            for res in executor.scan(nifty_50):
+                print(f"Done: {res['Ticker']} {res['Sentiment']} ({res['Confidence']:.2%})")
+                if renderer is not None:
+                    renderer.submit(res['Ticker'], res.pop('Backtest'))
+                results.append(res)
             
         # Display Summary
         print(f"\n{'='*60}")
@@ -185,19 +390,91 @@ def main():
             
     else:
         # Single Ticker Mode (Old Logic wrapped)
-        res = analyze_ticker(args.ticker, kite=kite_manager)
+        res = analyze_ticker(args.ticker, data, registry=registry,
+                             interval=args.interval, days=args.days, pooled=args.pooled,
+                             chain_store=chain_store if args.option_features else None)
         if res:
-            suggest_option_chain(res['Ticker'], res['Confidence'], res['Price'], kite=kite_manager)
-            # Re-run backtest for the chart
-            df = fetch_data(args.ticker)
-            df = add_indicators(df)
-            predictor = StockPredictor()
-            feature_cols = ['RSI', 'MACD', 'MACD_SIGNAL', 'BB_UPPER', 'BB_LOWER', 'EMA_50', 'EMA_200']
-            X, _, _ = predictor.prepare_data(df, feature_cols)
-            # Retrain for backtest logic... (simplified here, in reality we reuse the model)
-            # For backtest display, we need the prediction array on test set
-            # ... skipping re-implementation of backtest in scan mode to keep code clean ...
+            suggest_option_chain(res['Ticker'], res['Confidence'], res['Price'], data,
+                                 volatility=res['Volatility'])
+            if args.walk_forward:
+                from data_processor import add_indicators
+                from walk_forward import walk_forward
+                from backtester import Backtester
+                # Out-of-sample backtest: each fold is scored by a model that never saw it
+                # (same bars as the analysis above, served from the data-source cache)
+                df = data.get("history", ticker=args.ticker, interval=args.interval, days=args.days)
+                df = add_indicators(df)
+                df_oos, probabilities, folds = walk_forward(df, FEATURE_COLS, n_folds=args.folds,
+                                                            mode=args.window, workers=args.workers)
+                print(f"\nWalk-forward folds ({args.window} window):")
+                print(folds.to_string(index=False))
+                
+                backtester = Backtester(df_oos, probabilities)
+                if args.option_backtest:
+                    strike_step = 100 if 'BANK' in args.ticker else 50
+                    volatility = None
+                    if chain_store is not None:
+                        volatility = stored_volatility(args.ticker, df_oos, chain_store, args.interval)
+                    results, capital, win_rate = backtester.run_options(
+                        strike_step=strike_step, volatility=volatility,
+                        periods_per_year=periods_per_year(args.interval))
+                else:
+                    results, capital, win_rate = backtester.run()
+                print(f"Final Capital: {capital:.2f} | Trades: {len(results)} | Win Rate: {win_rate:.2f}%")
+                backtester.plot_equity(results, name=args.ticker, renderer=renderer)
             print("\nDone.")
 
+def main():
+    parser = argparse.ArgumentParser(description="NSE Options ML Predictor")
+    parser.add_argument("--ticker", type=str, default="^NSEI", help="Ticker symbol")
+    parser.add_argument("--scan_nifty", action="store_true", help="Scan all Nifty 50 stocks")
+    parser.add_argument("--kite", action="store_true", help="Use Kite Connect")
+    parser.add_argument("--token", type=str, help="Kite Request Token")
+    parser.add_argument("--interval", choices=["day", "minute", "3minute", "5minute", "15minute", "60minute"],
+                        default="day", help="Bar interval for Kite data (intraday bars are resampled from 1-minute bars)")
+    parser.add_argument("--days", type=int, default=3650, help="History to fetch from Kite, in days")
+    parser.add_argument("--live", action="store_true", help="Stream ticks and score each closed bar (needs intraday --interval)")
+    parser.add_argument("--replay", type=str, default=None, help="Recorded ticks CSV to replay instead of the Kite WebSocket")
+    parser.add_argument("--workers", type=int, default=None, help="Model fit processes for scans (default: CPU count)")
+    parser.add_argument("--io_workers", type=int, default=8, help="Concurrent downloads for scans")
+    parser.add_argument("--cache_dir", type=str, default=None, help="Directory for the local OHLCV cache")
+    parser.add_argument("--no_cache", action="store_true", help="Always download full history")
+    parser.add_argument("--offline", action="store_true", help="Serve price data from the local cache only")
+    parser.add_argument("--model_dir", type=str, default=None, help="Directory for saved per-ticker models")
+    parser.add_argument("--pooled", action="store_true", help="One model fitted across all scanned tickers (reused in single-ticker mode)")
+    parser.add_argument("--retrain", action="store_true", help="Ignore saved models and fit from scratch")
+    parser.add_argument("--store_chains", action="store_true", help="Save fetched option chains to the snapshot store")
+    parser.add_argument("--poll_chains", type=str, default=None,
+                        help="Only poll these NSE option chains (e.g. NIFTY,BANKNIFTY) into the snapshot store")
+    parser.add_argument("--poll_interval", type=float, default=5.0, help="Seconds between option-chain polls")
+    parser.add_argument("--poll_count", type=int, default=None, help="Stop after storing this many snapshots (default: until Ctrl+C)")
+    parser.add_argument("--option_features", action="store_true",
+                        help="Add PCR, max-pain, IV and OI features from stored chain snapshots (single-ticker mode)")
+    parser.add_argument("--walk_forward", action="store_true", help="Walk-forward backtest in single-ticker mode")
+    parser.add_argument("--folds", type=int, default=5, help="Number of walk-forward folds")
+    parser.add_argument("--window", choices=["expanding", "rolling"], default="expanding", help="Walk-forward training window")
+    parser.add_argument("--option_backtest", action="store_true", help="Price ATM options in the walk-forward backtest")
+    parser.add_argument("--charts_dir", type=str, default=None,
+                        help="Write per-ticker backtest charts plus summary.html/.csv here (per-ticker scan, walk-forward)")
+    parser.add_argument("--chart_workers", type=int, default=2, help="Background processes rendering charts")
+    parser.add_argument("--report", type=str, default=None, help="Write per-run timings and counters to this .json or .csv file")
+    parser.add_argument("--profile", type=str, default=None, help="Write a cProfile dump of the main process to this file")
+    args = parser.parse_args()
+
+    profiler = None
+    if args.profile:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        run(args)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.profile)
+            print(f"cProfile dump written to {args.profile}")
+        if args.report:
+            RECORDER.print_summary()
+            print(f"Timing report written to {RECORDER.write_report(args.report)}")
+
 if __name__ == "__main__":
     main()
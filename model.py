@@ -1,28 +1,94 @@
 import numpy as np
-from sklearn.neural_network import MLPClassifier
-from sklearn.preprocessing import StandardScaler
+import os
 import pickle
+from features import feature_columns
+from instrumentation import timed
+
+def save_feature_array(df, feature_cols, path):
+    """
+    Writes feature columns plus Target as a float32 .npy file that can be memory-mapped.
+    One file per ticker (and interval); used by StockPredictor.prepare_chunks().
+    """
+    arr = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                    shape=(len(df), len(feature_cols) + 1))
+    arr[:, :-1] = df[feature_cols].to_numpy(dtype=np.float32)
+    arr[:, -1] = df['Target'].to_numpy(dtype=np.float32)
+    arr.flush()
+    del arr
+    return path
+
+def iter_feature_chunks(paths, train_fraction=0.8, chunk_rows=100_000, subset="all"):
+    """
+    Yields raw (X, y) chunks from memory-mapped feature arrays.
+    Each file is split in time order: the first train_fraction rows are 'train', the rest 'test'.
+    """
+    for path in paths:
+        data = np.load(path, mmap_mode='r')
+        split = int(len(data) * train_fraction)
+        start, stop = {"train": (0, split), "test": (split, len(data)), "all": (0, len(data))}[subset]
+        for a in range(start, stop, chunk_rows):
+            block = np.array(data[a:min(a + chunk_rows, stop)])  # Copy just this chunk off the map
+            yield block[:, :-1], block[:, -1].astype(int)
+        del data
 
 class StockPredictor:
     def __init__(self):
+        from sklearn.preprocessing import StandardScaler
         self.model = None
         self.scaler = StandardScaler()
         
-    def prepare_data(self, df, feature_cols):
+    @timed("model.prepare_data")
+    def prepare_data(self, df, feature_cols, train_rows=None, fit=True, dtype=np.float32):
         """
         Prepares data for the Neural Network.
+        The scaler is fitted on the first train_rows rows only (all rows if None), so the
+        test slice never leaks into it. With fit=False the existing (e.g. loaded) scaler is reused.
+        Features are copied once into a float32 array and scaled in place.
+        feature_cols may mix column names and feature group names ('price', 'options', see features.py).
         """
-        X = df[feature_cols].values
+        X = df[feature_columns(*feature_cols)].to_numpy(dtype=dtype)
         y = df['Target'].values
         
-        X_scaled = self.scaler.fit_transform(X)
+        if fit:
+            self.scaler.fit(X if train_rows is None else X[:train_rows])
+        X_scaled = self.scaler.transform(X, copy=False)
         
         return X_scaled, y, self.scaler
+
+    def fit_scaler_chunks(self, paths, train_fraction=0.8, chunk_rows=100_000):
+        """
+        Fits the scaler incrementally on the training rows of memory-mapped feature arrays
+        written by save_feature_array(). Only one chunk is held in memory at a time.
+        """
+        from sklearn.preprocessing import StandardScaler
+        self.scaler = StandardScaler()
+        for X, _ in iter_feature_chunks(paths, train_fraction, chunk_rows, subset="train"):
+            self.scaler.partial_fit(X)
+        return self.scaler
+
+    def prepare_chunks(self, paths, train_fraction=0.8, chunk_rows=100_000, subset="train"):
+        """
+        Streams scaled (X, y) chunks (float32) for the train, test or all rows of every file.
+        Memory stays bounded by chunk_rows however many tickers/bars are on disk.
+        Call fit_scaler_chunks() first.
+        """
+        for X, y in iter_feature_chunks(paths, train_fraction, chunk_rows, subset):
+            yield self.scaler.transform(X, copy=False), y
+
+    @timed("model.train_chunks")
+    def train_chunks(self, paths, train_fraction=0.8, chunk_rows=100_000, epochs=1):
+        """Fits the model with partial_fit over streamed training chunks."""
+        if self.model is None:
+            self.build_model()
+        for _ in range(epochs):
+            for X, y in self.prepare_chunks(paths, train_fraction, chunk_rows, subset="train"):
+                self.model.partial_fit(X, y, classes=np.array([0, 1]))
         
     def build_model(self, input_shape=None):
         """
         Builds a Multi-layer Perceptron Neural Network.
         """
+        from sklearn.neural_network import MLPClassifier
         # MLP similar to the previous LSTM structure in depth
         self.model = MLPClassifier(hidden_layer_sizes=(64, 32, 16),
                                    activation='relu',
@@ -31,10 +97,35 @@ class StockPredictor:
                                    random_state=42)
         return self.model
         
+    @timed("model.train")
     def train(self, X_train, y_train, epochs=None, batch_size=None):
         # Epochs/batch_size are handled by max_iter/internal logic in sklearn or defaults
         self.model.fit(X_train, y_train)
         
+    @timed("model.predict")
     def predict(self, X):
         # Returns probability of class 1 (Bullish)
         return self.model.predict_proba(X)[:, 1]
+
+    @timed("model.update")
+    def update(self, X_new, y_new):
+        """Warm-starts an already fitted model with one extra pass over new bars."""
+        self.model.partial_fit(X_new, y_new)
+
+    def save(self, path, **metadata):
+        """Pickles the fitted model and scaler together with any metadata."""
+        state = {'model': self.model, 'scaler': self.scaler, **metadata}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Returns (predictor, metadata) from a file written by save()."""
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        predictor = cls()
+        predictor.model = state.pop('model')
+        predictor.scaler = state.pop('scaler')
+        return predictor, state
@@ -0,0 +1,109 @@
+import os
+import hashlib
+from model import StockPredictor
+from pooled import PooledPredictor
+from instrumentation import incr
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.expanduser("~"), ".nse_options_ml", "models")
+POOLED_MODEL_NAME = "_universe"
+
+def feature_hash(feature_cols):
+    """Stable hash of the ordered feature column list a model was trained on."""
+    return hashlib.sha1("|".join(feature_cols).encode()).hexdigest()
+
+class ModelRegistry:
+    """
+    Stores one fitted StockPredictor (model + scaler) per ticker, bar interval and feature set on
+    disk, along with the feature hash and the training window it was fitted on. Models of different
+    intervals or feature sets (e.g. price-only and with option features) never share a file, so
+    one kind of run cannot load (or overwrite) the other's model.
+    """
+    def __init__(self, model_dir=None, retrain=False):
+        self.model_dir = model_dir or os.getenv('NSE_ML_MODEL_DIR', DEFAULT_MODEL_DIR)
+        self.retrain = retrain  # Ignore stored models and always fit from scratch
+        os.makedirs(self.model_dir, exist_ok=True)
+
+    def _path(self, ticker, feature_cols, interval="day"):
+        safe_ticker = ticker.replace('^', '_').replace('/', '_').replace(':', '_')
+        return os.path.join(self.model_dir, f"{safe_ticker}_{interval}_{feature_hash(feature_cols)[:10]}.pkl")
+
+    def load(self, ticker, feature_cols, interval="day"):
+        """
+        Returns (predictor, metadata) for a stored model trained on the same features and interval,
+        or (None, None) if there is none, it is stale, or retrain was requested.
+        """
+        path = self._path(ticker, feature_cols, interval)
+        if self.retrain or not os.path.exists(path):
+            incr("cache.models.miss")
+            return None, None
+        try:
+            predictor, meta = StockPredictor.load(path)
+        except Exception as e:
+            print(f"Ignoring unreadable model for {ticker}: {e}")
+            return None, None
+        if meta.get('feature_hash') != feature_hash(feature_cols):
+            incr("cache.models.miss")
+            return None, None
+        incr("cache.models.hit")
+        return predictor, meta
+
+    def load_pooled(self, feature_cols, interval="day"):
+        """Returns (PooledPredictor, metadata) for the stored universe model, or (None, None)."""
+        path = self._path(POOLED_MODEL_NAME, feature_cols, interval)
+        if self.retrain or not os.path.exists(path):
+            return None, None
+        try:
+            predictor, meta = PooledPredictor.load(path)
+        except Exception as e:
+            print(f"Ignoring unreadable pooled model: {e}")
+            return None, None
+        if meta.get('feature_hash') != feature_hash(feature_cols):
+            return None, None
+        return predictor, meta
+
+    def save_pooled(self, predictor, tickers, interval="day"):
+        predictor.save(self._path(POOLED_MODEL_NAME, predictor.feature_cols, interval),
+                       interval=interval,
+                       feature_hash=feature_hash(predictor.feature_cols),
+                       tickers=list(tickers))
+
+    def save(self, ticker, predictor, feature_cols, train_start, train_end, n_rows, interval="day"):
+        predictor.save(self._path(ticker, feature_cols, interval),
+                       ticker=ticker,
+                       interval=interval,
+                       feature_cols=list(feature_cols),
+                       feature_hash=feature_hash(feature_cols),
+                       train_start=train_start,
+                       train_end=train_end,
+                       n_rows=n_rows)
+
+    def fit(self, ticker, df, feature_cols, split, interval="day"):
+        """
+        Returns a predictor trained on the first `split` rows of df, plus the scaled X, y.
+        Reuses the stored model if it already covers the training window, warm-starts it
+        with partial_fit on bars added since its last fit, or fits from scratch otherwise.
+        A stored model trained past this split (e.g. saved from a shorter history) has seen the
+        test rows, so it is refitted rather than reused.
+        """
+        predictor, meta = self.load(ticker, feature_cols, interval)
+        if predictor is not None and meta['train_end'] > df.index[split - 1]:
+            print(f"Stored {ticker} model was trained up to {meta['train_end']}, past this split; refitting")
+            predictor = None
+        
+        if predictor is None:
+            predictor = StockPredictor()
+            X, y, _ = predictor.prepare_data(df, feature_cols, train_rows=split)
+            predictor.build_model()
+            predictor.train(X[:split], y[:split])
+            n_rows = split
+        else:
+            # Keep the stored scaler so inputs match what the weights were trained on
+            X, y, _ = predictor.prepare_data(df, feature_cols, fit=False)
+            new_bars = df.index[:split] > meta['train_end']
+            if new_bars.any():
+                print(f"Warm-starting {ticker} model on {new_bars.sum()} new bars")
+                predictor.update(X[:split][new_bars], y[:split][new_bars])
+            n_rows = meta['n_rows'] + int(new_bars.sum())
+            
+        self.save(ticker, predictor, feature_cols, df.index[0], df.index[split - 1], n_rows, interval)
+        return predictor, X, y
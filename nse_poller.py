@@ -0,0 +1,116 @@
+import asyncio
+import random
+from nse_scraper import NSE_HOME, NSE_HEADERS, INDEX_SYMBOLS, option_chain_url
+from instrument_master import exchange_now
+from instrumentation import span, incr
+
+def _default_session():
+    from curl_cffi.requests import AsyncSession
+    return AsyncSession(impersonate="chrome120", headers=NSE_HEADERS)
+
+class NSEPoller:
+    """
+    Polls NSE option chains for a basket of symbols concurrently over one long-lived async session.
+    Cookies are refreshed only when NSE answers 401/403. A failing symbol is retried with
+    jittered exponential backoff without holding up the rest of the basket.
+    Snapshots are delivered as (timestamp, {symbol: chain_json}) through snapshots() or run(callback).
+    """
+    def __init__(self, symbols=INDEX_SYMBOLS, interval=5.0, timeout=10, base_backoff=1.0,
+                 max_backoff=60.0, session_factory=None):
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.timeout = timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.session_factory = session_factory or _default_session
+        self.session = None
+        self.running = False
+        self._cookie_lock = asyncio.Lock()
+        self._cookie_generation = 0  # Bumped on every refresh so concurrent 401s refresh once
+        self._failures = {}  # symbol -> consecutive failures
+        self._retry_at = {}  # symbol -> loop time before which the symbol is skipped
+
+    async def _refresh_cookies(self, generation):
+        async with self._cookie_lock:
+            if self._cookie_generation != generation:
+                return  # Another request already refreshed them
+            try:
+                await self.session.get(NSE_HOME, timeout=self.timeout)
+            except Exception as e:
+                print(f"NSE cookie refresh failed: {e}")
+            self._cookie_generation += 1
+
+    async def fetch(self, symbol):
+        """Fetches one option chain. Raises on failure so the caller can back off."""
+        if self.session is None:
+            self.session = self.session_factory()
+
+        url = option_chain_url(symbol)
+        generation = self._cookie_generation
+        with span("network.nse.option_chain"):
+            response = await self.session.get(url, timeout=self.timeout)
+            if response.status_code in (401, 403):
+                await self._refresh_cookies(generation)
+                response = await self.session.get(url, timeout=self.timeout)
+        incr("nse.bytes", len(response.content))
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        return response.json()
+
+    async def _fetch_with_backoff(self, symbol):
+        loop = asyncio.get_running_loop()
+        if loop.time() < self._retry_at.get(symbol, 0):
+            return None
+        try:
+            data = await self.fetch(symbol)
+        except Exception as e:
+            failures = self._failures.get(symbol, 0) + 1
+            self._failures[symbol] = failures
+            delay = min(self.max_backoff, self.base_backoff * 2 ** (failures - 1)) * random.uniform(0.5, 1.5)
+            self._retry_at[symbol] = loop.time() + delay
+            print(f"NSE fetch failed for {symbol} ({e}), retrying in {delay:.1f}s")
+            return None
+        self._failures.pop(symbol, None)
+        self._retry_at.pop(symbol, None)
+        return data
+
+    async def poll_once(self):
+        """Fetches every symbol concurrently. Returns {symbol: chain_json} for the ones that succeeded."""
+        results = await asyncio.gather(*(self._fetch_with_backoff(s) for s in self.symbols))
+        return {symbol: data for symbol, data in zip(self.symbols, results) if data}
+
+    async def snapshots(self):
+        """Async iterator of (timestamp, snapshot) every `interval` seconds until stop()."""
+        loop = asyncio.get_running_loop()
+        self.running = True
+        try:
+            while self.running:
+                started = loop.time()
+                timestamp = exchange_now()
+                snapshot = await self.poll_once()
+                if snapshot:
+                    yield timestamp, snapshot
+                await asyncio.sleep(max(0.0, self.interval - (loop.time() - started)))
+        finally:
+            await self.close()
+
+    async def run(self, callback, iterations=None):
+        """Calls callback(timestamp, snapshot) for each snapshot (at most `iterations` times)."""
+        count = 0
+        snapshots = self.snapshots()
+        try:
+            async for timestamp, snapshot in snapshots:
+                callback(timestamp, snapshot)
+                count += 1
+                if iterations is not None and count >= iterations:
+                    break
+        finally:
+            await snapshots.aclose()
+
+    def stop(self):
+        self.running = False
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
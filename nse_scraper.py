@@ -1,22 +1,121 @@
-import requests
-import json
+from operator import itemgetter
+import numpy as np
 import pandas as pd
-import time
+from instrumentation import span, incr
 
-from curl_cffi import requests
-import json
-import pandas as pd
-import time
+NSE_HOME = "https://www.nseindia.com"
+INDEX_SYMBOLS = ('NIFTY', 'BANKNIFTY', 'FINNIFTY')
+NSE_HEADERS = {
+    'authority': 'www.nseindia.com',
+    'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'accept-language': 'en-US,en;q=0.9',
+    'cache-control': 'max-age=0',
+    'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+
+def option_chain_url(symbol):
+    if symbol in INDEX_SYMBOLS:
+        return f"{NSE_HOME}/api/option-chain-indices?symbol={symbol}"
+    return f"{NSE_HOME}/api/option-chain-equities?symbol={symbol}"
+
+# Column suffix -> NSE JSON key, filled for both the CE and PE leg of each strike
+CHAIN_FIELDS = {
+    'LTP': 'lastPrice',
+    'OI': 'openInterest',
+    'CHG_OI': 'changeinOpenInterest',
+    'IV': 'impliedVolatility',
+    'BID': 'bidprice',
+    'ASK': 'askPrice',
+    'VOLUME': 'totalTradedVolume',
+}
+_leg_getter = itemgetter(*CHAIN_FIELDS.values())
+
+class OptionChainColumns:
+    """
+    Every expiry of an NSE option chain as NumPy columns, sorted by (expiry, strike).
+    Columns: Strike plus CE_/PE_ LTP, OI, CHG_OI, IV, BID, ASK, VOLUME (NaN where a leg is missing).
+    Each expiry is a contiguous slice, so per-expiry views and ATM lookups need no filtering.
+    """
+    def __init__(self, expiries, expiry_codes, columns, spot=None, timestamp=None):
+        self.expiries = expiries  # Expiry strings in NSE order (nearest first)
+        self.expiry_codes = expiry_codes  # Index into expiries, per row
+        self.columns = columns
+        self.spot = spot
+        self.timestamp = timestamp
+        self._bounds = np.searchsorted(expiry_codes, np.arange(len(expiries) + 1))
+
+    @classmethod
+    def from_json(cls, data):
+        """Single pass over the records filling preallocated columns for all expiries."""
+        records = data['records']['data']
+        n = len(records)
+        expiries = list(data['records']['expiryDates'])
+        code_of = {e: i for i, e in enumerate(expiries)}
+        
+        strikes = np.empty(n)
+        codes = np.empty(n, dtype=np.int32)
+        legs = {leg: np.full((n, len(CHAIN_FIELDS)), np.nan) for leg in ("CE", "PE")}
+        
+        for i, item in enumerate(records):
+            strikes[i] = item['strikePrice']
+            expiry = item['expiryDate']
+            code = code_of.get(expiry)
+            if code is None:
+                code = code_of[expiry] = len(expiries)
+                expiries.append(expiry)
+            codes[i] = code
+            for leg, block in legs.items():
+                leg_data = item.get(leg)
+                if leg_data:
+                    try:
+                        block[i] = _leg_getter(leg_data)
+                    except KeyError:
+                        block[i] = [leg_data.get(key, np.nan) for key in CHAIN_FIELDS.values()]
+                        
+        # NSE usually sends rows grouped by expiry and strike already; sort only if needed
+        order = np.lexsort((strikes, codes))
+        if np.any(order != np.arange(n)):
+            strikes, codes = strikes[order], codes[order]
+            legs = {leg: block[order] for leg, block in legs.items()}
+            
+        columns = {'Strike': strikes}
+        for leg, block in legs.items():
+            for j, name in enumerate(CHAIN_FIELDS):
+                columns[f"{leg}_{name}"] = block[:, j]
+                
+        return cls(expiries, codes, columns,
+                   spot=data['records'].get('underlyingValue'),
+                   timestamp=data['records'].get('timestamp'))
+
+    def expiry_slice(self, expiry=None):
+        """Row slice of one expiry (nearest if None)."""
+        code = 0 if expiry is None else self.expiries.index(expiry)
+        return slice(self._bounds[code], self._bounds[code + 1])
+
+    def strikes(self, expiry=None):
+        return self.columns['Strike'][self.expiry_slice(expiry)]
+
+    def atm_strike(self, spot, expiry=None):
+        """Listed strike closest to spot (lower strike on ties), via searchsorted."""
+        strikes = self.strikes(expiry)
+        if not len(strikes):
+            return None
+        i = int(np.searchsorted(strikes, spot))
+        if i > 0 and (i == len(strikes) or spot - strikes[i - 1] <= strikes[i] - spot):
+            i -= 1
+        strike = strikes[i].item()
+        return int(strike) if strike.is_integer() else strike
+
+    def to_frame(self, expiry=None, columns=None):
+        """DataFrame view of one expiry (all expiries if expiry == 'all')."""
+        rows = slice(None) if expiry == 'all' else self.expiry_slice(expiry)
+        names = columns or list(self.columns)
+        return pd.DataFrame({name: self.columns[name][rows] for name in names})
 
 class NSEScraper:
     def __init__(self):
-        self.headers = {
-            'authority': 'www.nseindia.com',
-            'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'accept-language': 'en-US,en;q=0.9',
-            'cache-control': 'max-age=0',
-            'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        }
+        from curl_cffi import requests
+        self.headers = dict(NSE_HEADERS)
         self.session = requests.Session(impersonate="chrome120")
         self.session.headers.update(self.headers)
         self._refresh_cookies()
@@ -24,16 +123,14 @@ class NSEScraper:
     def _refresh_cookies(self):
         try:
             # NSE requires visiting the homepage first to set cookies
-            self.session.get("https://www.nseindia.com", timeout=10)
+            with span("network.nse.home"):
+                self.session.get(NSE_HOME, timeout=10)
         except Exception as e:
             pass
 
     def fetch_option_chain(self, symbol="NIFTY"):
-        if symbol in ['NIFTY', 'BANKNIFTY', 'FINNIFTY']:
-            url = f"https://www.nseindia.com/api/option-chain-indices?symbol={symbol}"
-        else:
-            url = f"https://www.nseindia.com/api/option-chain-equities?symbol={symbol}"
-            
+        url = option_chain_url(symbol)
+        
         try:
             # API headers must match what a browser sends for XHR
             # IMPERSONATE ONLY: Do NOT set explicit headers that clash with impersonation
@@ -41,53 +138,37 @@ class NSEScraper:
             # We just add specific ones if needed.
             
             # First request might fail or be redirected, so we try with fresh cookies if needed
-            response = self.session.get(url, timeout=10)
-            
-            if response.status_code == 401:
-                self._refresh_cookies()
+            with span("network.nse.option_chain"):
                 response = self.session.get(url, timeout=10)
                 
+                if response.status_code in (401, 403):
+                    incr("nse.cookie_refresh")
+                    self._refresh_cookies()
+                    response = self.session.get(url, timeout=10)
+            incr("nse.bytes", len(response.content))
+                
             if response.status_code == 200:
                 return response.json()
             return None
         except Exception as e:
             return None
 
+    def parse_chain_columns(self, data):
+        """Parses all expiries of the chain JSON into NumPy columns (see OptionChainColumns)."""
+        if not data: return None
+        return OptionChainColumns.from_json(data)
+
     def get_atm_strike(self, option_data, spot_price):
         """Finds ATM strike based on spot price from option chain data"""
         if not option_data:
             return None
-            
-        strikes = [x['strikePrice'] for x in option_data['records']['data'] if x['expiryDate'] == option_data['records']['expiryDates'][0]]
-        strikes = sorted(list(set(strikes)))
-        
-        # Find closest strike
-        atm_strike = min(strikes, key=lambda x: abs(x - spot_price))
-        return atm_strike
+        return self.parse_chain_columns(option_data).atm_strike(spot_price)
 
     def parse_chain(self, data, expiry_date=None):
         """Parses the complex JSON into a simple DataFrame"""
         if not data: return None
         
-        records = data['records']['data']
-        # If no expiry specified, pick the first one (near month)
-        if not expiry_date:
-            expiry_date = data['records']['expiryDates'][0]
-            
-        # Filter by expiry
-        filtered = [x for x in records if x['expiryDate'] == expiry_date]
-        
-        rows = []
-        for item in filtered:
-            row = {'Strike': item['strikePrice']}
-            if 'CE' in item:
-                row['CE_LTP'] = item['CE']['lastPrice']
-                row['CE_OI'] = item['CE']['openInterest']
-                row['CE_IV'] = item['CE']['impliedVolatility']
-            if 'PE' in item:
-                row['PE_LTP'] = item['PE']['lastPrice']
-                row['PE_OI'] = item['PE']['openInterest']
-                row['PE_IV'] = item['PE']['impliedVolatility']
-            rows.append(row)
-            
-        return pd.DataFrame(rows)
+        # If no expiry specified, the near month is used
+        chain = self.parse_chain_columns(data)
+        return chain.to_frame(expiry_date, columns=['Strike', 'CE_LTP', 'CE_OI', 'CE_IV',
+                                                    'PE_LTP', 'PE_OI', 'PE_IV'])
@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+from features import feature_columns
+from instrumentation import timed
+
+OPTION_FEATURES = feature_columns('options')
+# Stored chain columns the features are computed from (see ChainSnapshotStore.read())
+SNAPSHOT_COLUMNS = ['Spot', 'CE_LTP', 'PE_LTP', 'CE_OI', 'PE_OI', 'CE_CHG_OI', 'PE_CHG_OI',
+                    'CE_IV', 'PE_IV', 'CE_VOLUME', 'PE_VOLUME']
+SKEW_WIDTH = 0.05  # IV skew compares the put and call strikes this fraction below/above spot
+
+def _segment_cumsum(x, starts, counts):
+    """Inclusive running sum of x restarting at every snapshot."""
+    total = np.cumsum(x)
+    return total - np.repeat(total[starts] - x[starts], counts)
+
+def _nearest_rows(keys, starts, ends, targets):
+    """
+    Row of the strike closest to each snapshot's target (lower strike on ties).
+    keys are strikes offset per snapshot so the whole batch is one sorted array.
+    """
+    i = np.clip(np.searchsorted(keys, targets), starts, ends - 1)
+    prev = np.maximum(i - 1, starts)
+    return np.where(targets - keys[prev] <= keys[i] - targets, prev, i)
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / denominator, np.nan)
+
+def _max_pain(strikes, ce_oi, pe_oi, starts, ends, counts):
+    """
+    Max-pain strike per snapshot: the strike where option writers pay out least at expiry.
+    Payouts at every listed strike come from running OI sums, so the batch is O(rows), not O(strikes^2).
+    """
+    ce_sum = _segment_cumsum(ce_oi, starts, counts)
+    ce_weighted = _segment_cumsum(ce_oi * strikes, starts, counts)
+    pe_sum = _segment_cumsum(pe_oi, starts, counts)
+    pe_weighted = _segment_cumsum(pe_oi * strikes, starts, counts)
+    pe_total = np.repeat(pe_sum[ends - 1], counts)
+    pe_weighted_total = np.repeat(pe_weighted[ends - 1], counts)
+
+    # Calls below the strike finish in the money, and puts above it
+    pain = (strikes * ce_sum - ce_weighted) + (pe_weighted_total - pe_weighted) - strikes * (pe_total - pe_sum)
+    at_min = np.flatnonzero(pain <= np.repeat(np.minimum.reduceat(pain, starts), counts))
+    snapshot = np.repeat(np.arange(len(starts)), counts)[at_min]
+    first = at_min[np.r_[True, snapshot[1:] != snapshot[:-1]]]
+    return strikes[first]
+
+@timed("option_features")
+def snapshot_features(snapshots, skew_width=SKEW_WIDTH):
+    """
+    Option features (see features.FEATURE_GROUPS['options']) for every snapshot in a batch of
+    stored chain rows, as a DataFrame indexed by Timestamp. Only each snapshot's nearest expiry is used.
+    All snapshots are computed together with NumPy segment operations; nothing loops per row or per snapshot.
+      PCR_OI, PCR_VOLUME   put/call ratio of total open interest and traded volume
+      MAX_PAIN_DIST        (max-pain strike - spot) / spot
+      ATM_IV               mean CE/PE IV at the strike nearest spot (annualised)
+      IV_SKEW              put IV skew_width below spot minus call IV skew_width above it
+      STRADDLE_PCT         ATM CE + PE premium / spot
+      CE_OI_CHG, PE_OI_CHG change in open interest over the session / open interest
+    """
+    if snapshots.empty:
+        return pd.DataFrame(columns=OPTION_FEATURES, index=pd.DatetimeIndex([], name='Timestamp'), dtype=float)
+
+    times = snapshots['Timestamp'].to_numpy()
+    strikes = snapshots['Strike'].to_numpy(dtype=float)
+    # Sortable expiry keys ('2024-11-28'), so the nearest expiry sorts first within each snapshot
+    expiries = pd.factorize(snapshots['Expiry'], sort=True)[0] if 'Expiry' in snapshots else np.zeros(len(times), int)
+    order = np.lexsort((strikes, expiries, times))
+    times, expiries = times[order], expiries[order]
+    first = np.r_[True, times[1:] != times[:-1]]
+    nearest = expiries[np.maximum.accumulate(np.where(first, np.arange(len(times)), 0))]
+    keep = expiries == nearest
+    order, times = order[keep], times[keep]
+    strikes = strikes[order]
+
+    def column(name, fill=None):
+        values = snapshots[name].to_numpy(dtype=float)[order]
+        return values if fill is None else np.nan_to_num(values, nan=fill)
+
+    starts = np.flatnonzero(np.r_[True, times[1:] != times[:-1]])
+    ends = np.r_[starts[1:], len(times)]
+    counts = ends - starts
+    spot = column('Spot')[starts]
+    ce_oi, pe_oi = column('CE_OI', 0), column('PE_OI', 0)
+    ce_oi_total, pe_oi_total = np.add.reduceat(ce_oi, starts), np.add.reduceat(pe_oi, starts)
+
+    # One sorted key array for the whole batch: strikes offset by a per-snapshot stride
+    stride = 4 * max(np.nanmax(strikes), np.nanmax(spot)) + 1
+    offsets = np.arange(len(starts)) * stride
+    keys = strikes + np.repeat(offsets, counts)
+    has_spot = np.isfinite(spot)
+    spot_or_strike = np.where(has_spot, spot, strikes[starts])
+    atm = _nearest_rows(keys, starts, ends, offsets + spot_or_strike)
+    put_wing = _nearest_rows(keys, starts, ends, offsets + spot_or_strike * (1 - skew_width))
+    call_wing = _nearest_rows(keys, starts, ends, offsets + spot_or_strike * (1 + skew_width))
+
+    # NSE reports IV in percent, 0 when there is no quote
+    ce_iv, pe_iv = (np.where(iv == 0, np.nan, iv) for iv in (column('CE_IV'), column('PE_IV')))
+    # Mean of whichever ATM IVs are quoted (nanmean would warn on snapshots with neither)
+    atm_ivs = np.stack([ce_iv[atm], pe_iv[atm]])
+    atm_iv = _ratio(np.nansum(atm_ivs, axis=0), np.isfinite(atm_ivs).sum(axis=0)) / 100
+    max_pain = _max_pain(strikes, ce_oi, pe_oi, starts, ends, counts)
+    max_pain[ce_oi_total + pe_oi_total == 0] = np.nan
+
+    features = {
+        'PCR_OI': _ratio(pe_oi_total, ce_oi_total),
+        'PCR_VOLUME': _ratio(np.add.reduceat(column('PE_VOLUME', 0), starts),
+                             np.add.reduceat(column('CE_VOLUME', 0), starts)),
+        'MAX_PAIN_DIST': (max_pain - spot) / spot,
+        'ATM_IV': atm_iv,
+        'IV_SKEW': (pe_iv[put_wing] - ce_iv[call_wing]) / 100,
+        'STRADDLE_PCT': (column('CE_LTP')[atm] + column('PE_LTP')[atm]) / spot,
+        'CE_OI_CHG': _ratio(np.add.reduceat(column('CE_CHG_OI', 0), starts), ce_oi_total),
+        'PE_OI_CHG': _ratio(np.add.reduceat(column('PE_CHG_OI', 0), starts), pe_oi_total),
+    }
+    for name in ('ATM_IV', 'IV_SKEW', 'STRADDLE_PCT'):
+        features[name][~has_spot] = np.nan
+    return pd.DataFrame(features, index=pd.DatetimeIndex(times[starts], name='Timestamp'))[OPTION_FEATURES]
+
+def load_option_features(store, symbol, start, end, skew_width=SKEW_WIDTH):
+    """snapshot_features() for every snapshot of symbol stored between start and end."""
+    return snapshot_features(store.read(symbol, start, end, columns=SNAPSHOT_COLUMNS), skew_width)
+
+def align_to_bars(features, index, lag=None, tolerance=None):
+    """
+    Snapshot features as of each bar: the last snapshot at or before index + lag, so bars labelled by
+    their open time (Kite, yfinance daily) should pass their length as lag to see the snapshot at close.
+    Bars with no snapshot within tolerance get NaN. Returns a DataFrame on index.
+    """
+    times = pd.DatetimeIndex(index)
+    if times.tz is not None:
+        times = times.tz_localize(None)  # Snapshots are stored in exchange-local time
+    if lag is not None:
+        times = times + pd.Timedelta(lag)
+    bars = pd.DataFrame({'BarTime': times.as_unit('ns')})
+    snapshots = features.set_axis(pd.DatetimeIndex(features.index).as_unit('ns')).sort_index()
+    aligned = pd.merge_asof(bars, snapshots, left_on='BarTime', right_index=True,
+                            direction='backward', tolerance=None if tolerance is None else pd.Timedelta(tolerance))
+    return aligned[list(features.columns)].set_axis(index)
+
+def add_option_features(df, features, lag=None, tolerance=None):
+    """Joins aligned snapshot features (see align_to_bars()) onto the bars in df, in place."""
+    aligned = align_to_bars(features, df.index, lag, tolerance)
+    for name in aligned.columns:
+        df[name] = aligned[name].to_numpy()
+    return df
+
+def add_stored_option_features(df, store, symbol, lag=None, tolerance=None):
+    """
+    Reads the snapshots of symbol covering df's bars from a ChainSnapshotStore and joins their
+    features onto df, in place (see add_option_features()).
+    """
+    times = pd.DatetimeIndex(df.index)
+    if times.tz is not None:
+        times = times.tz_localize(None)
+    start = times[0] - (pd.Timedelta(0) if tolerance is None else pd.Timedelta(tolerance))
+    end = times[-1] + (pd.Timedelta(0) if lag is None else pd.Timedelta(lag))
+    return add_option_features(df, load_option_features(store, symbol, start, end), lag, tolerance)
@@ -0,0 +1,166 @@
+from datetime import datetime, time as dtime
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+RISK_FREE_RATE = 0.065  # Approx. Indian 91-day T-bill yield
+DEFAULT_VOLATILITY = 0.15  # Used when no volatility estimate is available
+DEFAULT_EXPIRY_DAYS = 7  # Weekly index options
+EXPIRY_TIME = dtime(15, 30)  # NSE F&O contracts expire at market close
+MIN_TIME = 1 / (365 * 24 * 60)  # One minute, avoids division by zero at expiry
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+def _d1_d2(S, K, T, r, sigma, q):
+    sqrt_t = np.sqrt(T)
+    vol_t = sigma * sqrt_t
+    d1 = (np.log(S / K) + (r - q + 0.5 * sigma * sigma) * T) / vol_t
+    return d1, d1 - vol_t, sqrt_t
+
+def bs_price(S, K, T, r, sigma, is_call, q=0.0):
+    """
+    Black-Scholes price for arrays of European options (broadcasts over all inputs).
+    T in years, sigma annualised (0.15 = 15%), is_call boolean (array).
+    """
+    S, K, T, sigma = np.asarray(S, float), np.asarray(K, float), np.maximum(T, MIN_TIME), np.asarray(sigma, float)
+    d1, d2, _ = _d1_d2(S, K, T, r, sigma, q)
+    disc_s, disc_k = S * np.exp(-q * T), K * np.exp(-r * T)
+    call = disc_s * ndtr(d1) - disc_k * ndtr(d2)
+    put = disc_k * ndtr(-d2) - disc_s * ndtr(-d1)
+    return np.where(is_call, call, put)
+
+def bs_greeks(S, K, T, r, sigma, is_call, q=0.0):
+    """
+    Price and Greeks for arrays of options in one pass.
+    Returns a dict of arrays: price, delta, gamma, theta (per calendar day), vega (per 1 vol point).
+    """
+    S, K, T, sigma = np.asarray(S, float), np.asarray(K, float), np.maximum(T, MIN_TIME), np.asarray(sigma, float)
+    d1, d2, sqrt_t = _d1_d2(S, K, T, r, sigma, q)
+    disc_s, disc_k = S * np.exp(-q * T), K * np.exp(-r * T)
+    pdf_d1 = _norm_pdf(d1)
+    cdf_d1, cdf_d2 = ndtr(d1), ndtr(d2)
+
+    call = disc_s * cdf_d1 - disc_k * cdf_d2
+    put = call - disc_s + disc_k  # Put-call parity
+    decay = -disc_s * pdf_d1 * sigma / (2 * sqrt_t)
+    call_theta = decay - r * disc_k * cdf_d2 + q * disc_s * cdf_d1
+    put_theta = decay + r * disc_k * (1 - cdf_d2) - q * disc_s * (1 - cdf_d1)
+
+    return {
+        'price': np.where(is_call, call, put),
+        'delta': np.where(is_call, np.exp(-q * T) * cdf_d1, np.exp(-q * T) * (cdf_d1 - 1)),
+        'gamma': np.exp(-q * T) * pdf_d1 / (S * sigma * sqrt_t),
+        'theta': np.where(is_call, call_theta, put_theta) / 365,
+        'vega': disc_s * pdf_d1 * sqrt_t / 100,
+    }
+
+def implied_volatility(price, S, K, T, r, is_call, q=0.0, tol=1e-6, max_iter=50, low=1e-4, high=5.0):
+    """
+    Vectorized implied volatility: Newton steps on vega, safeguarded by a bisection bracket
+    so every element converges (to within tol in price or in sigma).
+    Prices outside the no-arbitrage bounds give NaN.
+    """
+    price, S, K, T, is_call = np.broadcast_arrays(np.atleast_1d(np.asarray(price, float)), np.asarray(S, float),
+                                                  np.asarray(K, float), np.maximum(T, MIN_TIME), is_call)
+
+    disc_s, disc_k = S * np.exp(-q * T), K * np.exp(-r * T)
+    lower_bound = np.where(is_call, np.maximum(disc_s - disc_k, 0), np.maximum(disc_k - disc_s, 0))
+    upper_bound = np.where(is_call, disc_s, disc_k)
+    valid = np.isfinite(price) & (price > lower_bound) & (price < upper_bound)
+
+    lo = np.full(price.shape, low)
+    hi = np.full(price.shape, high)
+    # Brenner-Subrahmanyam ATM approximation as the starting point
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.clip(np.sqrt(2 * np.pi / T) * price / S, low, high)
+    sigma = np.where(np.isfinite(sigma), sigma, 0.2)
+    active = valid.copy()
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        s, k, t, c, p, sg = S[active], K[active], T[active], is_call[active], price[active], sigma[active]
+        d1, d2, sqrt_t = _d1_d2(s, k, t, r, sg, q)
+        d_s, d_k = s * np.exp(-q * t), k * np.exp(-r * t)
+        call = d_s * ndtr(d1) - d_k * ndtr(d2)
+        model = np.where(c, call, call - d_s + d_k)
+        diff = model - p
+        vega = d_s * _norm_pdf(d1) * sqrt_t
+
+        # Shrink the bracket: price is increasing in sigma
+        a_lo, a_hi = lo[active], hi[active]
+        a_hi = np.where(diff > 0, sg, a_hi)
+        a_lo = np.where(diff <= 0, sg, a_lo)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            step = sg - diff / vega
+        outside = ~np.isfinite(step) | (step <= a_lo) | (step >= a_hi)
+        converged = np.abs(diff) < tol
+        new_sigma = np.where(converged, sg, np.where(outside, 0.5 * (a_lo + a_hi), step))
+
+        lo[active], hi[active], sigma[active] = a_lo, a_hi, new_sigma
+        done = converged | (a_hi - a_lo < tol)
+        idx = np.flatnonzero(active)
+        active[idx[done]] = False
+
+    return np.where(valid, sigma, np.nan)
+
+def time_to_expiry(expiry, now=None):
+    """
+    Years from now to expiry (15:30 on the expiry day).
+    expiry: date/datetime or an NSE expiry string ('28-Nov-2024').
+    """
+    if isinstance(expiry, str):
+        expiry = datetime.strptime(expiry, "%d-%b-%Y")
+    expiry = pd.Timestamp(expiry).normalize() + pd.Timedelta(hours=EXPIRY_TIME.hour, minutes=EXPIRY_TIME.minute)
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    return max((expiry - now).total_seconds() / (365 * 86400), MIN_TIME)
+
+def chain_greeks(strikes, ce_ltp, pe_ltp, spot, T, r=RISK_FREE_RATE, q=0.0):
+    """
+    Implied vol and Greeks for both legs of a strike ladder, solved from market LTPs.
+    Returns a DataFrame with Strike and CE_/PE_ IMPLIED_VOL, PRICE (model, at implied vol),
+    DELTA, GAMMA, THETA, VEGA. Legs without a usable LTP get NaN.
+    """
+    strikes = np.asarray(strikes, float)
+    n = len(strikes)
+    # Solve both legs together as one 2n-long array
+    K = np.concatenate([strikes, strikes])
+    ltp = np.concatenate([np.asarray(ce_ltp, float), np.asarray(pe_ltp, float)])
+    is_call = np.arange(2 * n) < n
+    T = np.broadcast_to(np.asarray(T, float), n)
+    T = np.concatenate([T, T])
+
+    iv = implied_volatility(ltp, spot, K, T, r, is_call, q)
+    greeks = bs_greeks(spot, K, T, r, np.where(np.isfinite(iv), iv, np.nan), is_call, q)
+
+    out = {'Strike': strikes}
+    for leg, rows in (("CE", slice(0, n)), ("PE", slice(n, 2 * n))):
+        out[f"{leg}_IMPLIED_VOL"] = iv[rows]
+        for name, values in greeks.items():
+            out[f"{leg}_{name.upper()}"] = values[rows]
+    return pd.DataFrame(out)
+
+def greeks_from_chain(chain, expiry=None, spot=None, r=RISK_FREE_RATE, now=None):
+    """Greeks for one expiry of an OptionChainColumns (nearest expiry by default)."""
+    rows = chain.expiry_slice(expiry)
+    expiry = expiry or chain.expiries[0]
+    return chain_greeks(chain.columns['Strike'][rows], chain.columns['CE_LTP'][rows],
+                        chain.columns['PE_LTP'][rows], spot or chain.spot,
+                        time_to_expiry(expiry, now), r)
+
+def greeks_from_ladder(ladder, spots, r=RISK_FREE_RATE, now=None):
+    """
+    Greeks for a Kite ladder DataFrame (KiteDataManager.get_option_ladder()).
+    spots: dict underlying -> spot price. Returns one row per (Underlying, Expiry, Strike).
+    """
+    frames = []
+    for (name, expiry), legs in ladder.groupby(['Underlying', 'Expiry'], sort=False):
+        wide = legs.pivot_table(index='Strike', columns='Type', values='LTP', aggfunc='last')
+        wide = wide.reindex(columns=['CE', 'PE'])
+        df = chain_greeks(wide.index.to_numpy(), wide['CE'].to_numpy(float), wide['PE'].to_numpy(float),
+                          spots[name], time_to_expiry(expiry, now), r)
+        df.insert(0, 'Expiry', expiry)
+        df.insert(0, 'Underlying', name)
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+from model import StockPredictor
+
+class UniverseTensor:
+    """
+    Features of a ticker universe as one float32 array X of shape (ticker, time, feature) on a
+    shared time axis, with Target y (ticker, time), a valid mask (the ticker has a bar there) and a
+    train mask (the first train_fraction of each ticker's own bars).
+    """
+    def __init__(self, tickers, index, X, y, valid, train):
+        self.tickers = tickers
+        self.index = index
+        self.X = X
+        self.y = y
+        self.valid = valid
+        self.train = train
+
+    @classmethod
+    def from_frames(cls, frames, feature_cols, train_fraction=0.8):
+        """frames: {ticker: DataFrame with indicator columns and Target (see add_indicators())}."""
+        tickers = list(frames)
+        index = frames[tickers[0]].index
+        for ticker in tickers[1:]:
+            index = index.union(frames[ticker].index)
+
+        shape = (len(tickers), len(index))
+        X = np.full(shape + (len(feature_cols),), np.nan, dtype=np.float32)
+        y = np.zeros(shape, dtype=np.int8)
+        valid = np.zeros(shape, dtype=bool)
+        for i, ticker in enumerate(tickers):
+            df = frames[ticker]
+            pos = index.get_indexer(df.index)
+            X[i, pos] = df[feature_cols].to_numpy(dtype=np.float32)
+            y[i, pos] = df['Target'].to_numpy()
+            valid[i, pos] = True
+
+        rank = valid.cumsum(axis=1)
+        n_train = (valid.sum(axis=1) * train_fraction).astype(int)
+        train = valid & (rank <= n_train[:, None])
+        return cls(tickers, index, X, y, valid, train)
+
+    def last_rows(self):
+        """Time position of each ticker's latest bar."""
+        return self.valid.shape[1] - 1 - np.argmax(self.valid[:, ::-1], axis=1)
+
+def _zscore_stats(X):
+    mean = X.mean(axis=0, dtype=np.float64)
+    std = X.std(axis=0, dtype=np.float64)
+    std[std == 0] = 1.0
+    return mean.astype(np.float32), std.astype(np.float32)
+
+class PooledPredictor(StockPredictor):
+    """
+    One MLP fitted across a whole ticker universe instead of one per stock.
+    Features are z-scored per ticker (on that ticker's training bars), so price-level indicators
+    such as EMA_50 or BB_UPPER become comparable across names; the shared scaler is unused.
+    Training is a single fit on the stacked training rows of every ticker.
+    """
+    def __init__(self, feature_cols=None, train_fraction=0.8):
+        super().__init__()
+        self.feature_cols = feature_cols
+        self.train_fraction = train_fraction
+        self.stats = {}  # ticker -> (mean, std) per feature
+
+    def normalize(self, tensor):
+        """Z-scores tensor.X in place, ticker by ticker, and records each ticker's stats."""
+        for i, ticker in enumerate(tensor.tickers):
+            mean, std = _zscore_stats(tensor.X[i, tensor.train[i]])
+            tensor.X[i] -= mean
+            tensor.X[i] /= std
+            self.stats[ticker] = (mean, std)
+        return tensor
+
+    def fit_universe(self, frames):
+        """Builds and normalises the universe tensor from {ticker: DataFrame}, then fits once."""
+        tensor = self.normalize(UniverseTensor.from_frames(frames, self.feature_cols, self.train_fraction))
+        self.build_model()
+        self.train(tensor.X[tensor.train], tensor.y[tensor.train])
+        return tensor
+
+    def score_universe(self, tensor):
+        """
+        Scores every ticker's latest bar in one predict call, plus per-ticker test accuracy.
+        Returns a DataFrame with Ticker, Confidence, Accuracy and Rows (training bars).
+        """
+        n = len(tensor.tickers)
+        confidence = self.predict(tensor.X[np.arange(n), tensor.last_rows()])
+
+        test = tensor.valid & ~tensor.train
+        owner = np.nonzero(test)[0]
+        correct = (self.predict(tensor.X[test]) > 0.5) == tensor.y[test].astype(bool)
+        n_test = np.bincount(owner, minlength=n)
+        with np.errstate(invalid='ignore'):
+            accuracy = np.bincount(owner, weights=correct, minlength=n) / n_test
+
+        return pd.DataFrame({
+            'Ticker': tensor.tickers,
+            'Confidence': confidence,
+            'Accuracy': accuracy,
+            'Rows': tensor.train.sum(axis=1),
+        })
+
+    def score(self, ticker, df):
+        """
+        Per-ticker fallback: scores one ticker's latest bar (df with indicators and Target).
+        Tickers outside the training universe are normalised on their own training bars.
+        Returns (confidence, test accuracy).
+        """
+        X = df[self.feature_cols].to_numpy(dtype=np.float32)
+        y = df['Target'].to_numpy()
+        split = int(len(X) * self.train_fraction)
+        mean, std = self.stats.get(ticker) or _zscore_stats(X[:split])
+        X -= mean
+        X /= std
+        accuracy = self.model.score(X[split:], y[split:]) if split < len(X) else np.nan
+        return self.predict(X[-1:])[0], accuracy
+
+    def save(self, path, **metadata):
+        super().save(path, feature_cols=list(self.feature_cols), train_fraction=self.train_fraction,
+                     stats=self.stats, **metadata)
+
+    @classmethod
+    def load(cls, path):
+        predictor, state = super().load(path)
+        predictor.feature_cols = state.pop('feature_cols')
+        predictor.train_fraction = state.pop('train_fraction')
+        predictor.stats = state.pop('stats')
+        return predictor, state
@@ -0,0 +1,122 @@
+import html
+import os
+import numpy as np
+import pandas as pd
+from instrumentation import RECORDER, run_recorded, timed
+from scanner import process_pool
+
+DEFAULT_CHART_DIR = "reports"
+
+def chart_path(output_dir, name):
+    """Per-ticker chart file ('^NSEI' -> <output_dir>/_NSEI.png)."""
+    safe_name = name.replace('^', '_').replace('/', '_').replace(':', '_')
+    return os.path.join(output_dir, f"{safe_name}.png")
+
+@timed("report.render_chart")
+def render_equity_chart(results, path, title='Backtest Equity Curve'):
+    """
+    Saves the equity curve of a backtest (results with Date and Capital) as a PNG.
+    Uses an explicit Agg figure rather than pyplot, so nothing is kept in pyplot's global figure
+    list, no GUI backend is touched and it is safe to call from worker threads and processes.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(12, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(pd.to_datetime(results['Date']), results['Capital'])
+    ax.set_title(title)
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Capital')
+    ax.grid(True)
+    tmp_path = f"{path}.tmp.png"
+    fig.savefig(tmp_path)
+    fig.clear()  # Drop the artists now rather than whenever the figure is collected
+    os.replace(tmp_path, path)
+    return path
+
+def summarize_backtest(name, results):
+    """Summary row for one backtest: trades, win rate, final capital, return and max drawdown (%)."""
+    if results.empty:
+        return {'Ticker': name, 'Trades': 0, 'WinRate': np.nan, 'FinalCapital': np.nan,
+                'Return': np.nan, 'MaxDrawdown': np.nan}
+    capital = results['Capital'].to_numpy(dtype=float)
+    initial = capital[0] - results['PnL'].iloc[0]
+    equity = np.concatenate([[initial], capital])
+    drawdown = 1 - equity / np.maximum.accumulate(equity)
+    return {
+        'Ticker': name,
+        'Trades': len(results),
+        'WinRate': round(float((results['PnL'] > 0).mean() * 100), 2),
+        'FinalCapital': round(float(capital[-1]), 2),
+        'Return': round(float((capital[-1] / initial - 1) * 100), 2),
+        'MaxDrawdown': round(float(drawdown.max() * 100), 2),
+    }
+
+class ReportRenderer:
+    """
+    Renders backtest charts on a background process pool, one PNG per ticker under output_dir,
+    plus summary.csv / summary.html covering every submitted backtest.
+    submit() only queues the chart, so a scan keeps going while charts are drawn; close() waits
+    for them and writes the summaries. Workers only receive Date and Capital, and each figure is
+    freed once saved, so memory stays flat however many charts are rendered.
+    """
+    def __init__(self, output_dir=None, workers=2):
+        self.output_dir = output_dir or DEFAULT_CHART_DIR
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._pool = process_pool(workers)
+        self._pending = []
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def submit(self, name, results, title=None):
+        """Queues the equity chart of one backtest and records its summary row. Returns the chart path."""
+        row = summarize_backtest(name, results)
+        row['Chart'] = None
+        self._rows.append(row)
+        if results.empty:
+            return None
+        path = chart_path(self.output_dir, name)
+        row['Chart'] = os.path.basename(path)
+        # Only the columns the chart needs are sent to the worker
+        future = self._pool.submit(run_recorded, render_equity_chart, results[['Date', 'Capital']], path,
+                                   title or f"{name} Backtest Equity Curve")
+        self._pending.append((name, future))
+        return path
+
+    def close(self):
+        """Waits for every queued chart, then writes summary.csv and summary.html. Returns the summary."""
+        for name, future in self._pending:
+            try:
+                _, recorded = future.result()
+                RECORDER.merge(recorded)
+            except Exception as e:
+                print(f"Chart for {name} failed: {e}")
+                next(row for row in self._rows if row['Ticker'] == name)['Chart'] = None
+        self._pending = []
+        self._pool.shutdown()
+
+        summary = pd.DataFrame(self._rows, columns=['Ticker', 'Trades', 'WinRate', 'FinalCapital',
+                                                    'Return', 'MaxDrawdown', 'Chart'])
+        summary.to_csv(os.path.join(self.output_dir, "summary.csv"), index=False)
+        with open(os.path.join(self.output_dir, "summary.html"), 'w') as f:
+            f.write(summary_html(summary))
+        return summary
+
+def summary_html(summary):
+    """Standalone HTML page: the summary table followed by every chart (paths relative to the page)."""
+    charts = "\n".join(
+        f'<figure><img src="{html.escape(row.Chart)}" width="900"><figcaption>{html.escape(row.Ticker)}</figcaption></figure>'
+        for row in summary.itertuples() if pd.notna(row.Chart))
+    return (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Backtest Summary</title></head><body>\n"
+        "<h1>Backtest Summary</h1>\n"
+        f"{summary.drop(columns='Chart').to_html(index=False, na_rep='')}\n"
+        f"{charts}\n</body></html>\n"
+    )
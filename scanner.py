@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from instrumentation import RECORDER, run_recorded
+
+def process_pool(max_workers=None):
+    """
+    ProcessPoolExecutor whose workers are started by a forkserver (spawn where that is unavailable),
+    never forked: pools are created while download/writer threads are running, and forking a process
+    with live threads can copy a held lock into the child and deadlock it.
+    Worker functions and their arguments must therefore be importable/picklable.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+
+class ScanExecutor:
+    """
+    Runs the analysis pipeline for many tickers concurrently.
+    Downloads run on a thread pool (I/O bound), model fits run on a process pool (CPU bound).
+    Timings recorded inside the worker processes are merged into the parent's RECORDER.
+    """
+    def __init__(self, fetch_fn, score_fn, workers=None, io_workers=8):
+        # fetch_fn(ticker) -> DataFrame or None
+        # score_fn(ticker, df) -> result dict or None (must be picklable, i.e. module level)
+        self.fetch_fn = fetch_fn
+        self.score_fn = score_fn
+        self.workers = workers or os.cpu_count() or 1
+        self.io_workers = io_workers
+
+    def scan(self, tickers):
+        """
+        Yields result dicts as each ticker finishes.
+        A ticker that fails in either stage is reported and skipped, the rest keep running.
+        """
+        with ThreadPoolExecutor(max_workers=self.io_workers) as io_pool, \
+             process_pool(self.workers) as cpu_pool:
+            pending = {io_pool.submit(self.fetch_fn, t): ('fetch', t) for t in tickers}
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, ticker = pending.pop(future)
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        print(f"Skipping {ticker} ({stage} failed): {e}")
+                        continue
+
+                    if stage == 'fetch':
+                        # Hand the downloaded frame over to the fit/score stage
+                        if value is not None:
+                            pending[cpu_pool.submit(run_recorded, self.score_fn, ticker, value)] = ('score', ticker)
+                        continue
+                    value, recorded = value
+                    RECORDER.merge(recorded)
+                    if value:
+                        yield value
+
+    def fetch_all(self, tickers):
+        """
+        Runs only the download stage for every ticker concurrently.
+        Returns {ticker: DataFrame} in ticker order; failed or empty tickers are left out.
+        """
+        frames = {}
+        with ThreadPoolExecutor(max_workers=self.io_workers) as io_pool:
+            futures = {t: io_pool.submit(self.fetch_fn, t) for t in tickers}
+            for ticker, future in futures.items():
+                try:
+                    value = future.result()
+                except Exception as e:
+                    print(f"Skipping {ticker} (fetch failed): {e}")
+                    continue
+                if value is not None:
+                    frames[ticker] = value
+        return frames
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from option_pricing import bs_price, time_to_expiry, RISK_FREE_RATE
+
+TRADING_DAYS = 252
+SESSION_MINUTES = 375  # 09:15 to 15:29, one bar per minute
+
+def session_index(n_bars, freq="day", start="2015-01-01"):
+    """
+    Timestamps for n_bars bars: business days for 'day', or NSE session minutes
+    (09:15-15:29 on business days) for 'minute'.
+    """
+    if freq == "day":
+        return pd.bdate_range(start, periods=n_bars)
+    n_days = -(-n_bars // SESSION_MINUTES)
+    days = pd.bdate_range(start, periods=n_days) + pd.Timedelta(hours=9, minutes=15)
+    minutes = pd.to_timedelta(np.arange(SESSION_MINUTES), unit="min")
+    return pd.DatetimeIndex((days.values[:, None] + minutes.values[None, :]).ravel()[:n_bars])
+
+def gbm_ohlcv(n_bars, freq="day", start_price=100.0, mu=0.08, sigma=0.20, seed=0, start="2015-01-01"):
+    """
+    Deterministic OHLCV bars from geometric Brownian motion (annualised mu and sigma).
+    Open is the previous close plus an opening gap; High/Low extend past Open/Close by a
+    random intrabar range. Same seed, same bars.
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1 / (TRADING_DAYS if freq == "day" else TRADING_DAYS * SESSION_MINUTES)
+    returns = rng.normal((mu - 0.5 * sigma ** 2) * dt, sigma * np.sqrt(dt), n_bars)
+    close = start_price * np.exp(np.cumsum(returns))
+    previous = np.concatenate([[start_price], close[:-1]])
+    open_ = previous * np.exp(rng.normal(0, 0.1 * sigma * np.sqrt(dt), n_bars))
+    spread = np.abs(rng.normal(0, 0.5 * sigma * np.sqrt(dt), n_bars))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + spread),
+        'Low': np.minimum(open_, close) * (1 - spread),
+        'Close': close,
+        'Volume': rng.integers(10_000, 1_000_000, n_bars).astype(float),
+    }, index=session_index(n_bars, freq, start))
+
+def _weekly_expiries(now, n_expiries):
+    """Next n Thursdays (NSE weekly expiry) on or after now."""
+    first = now.date() + timedelta(days=(3 - now.weekday()) % 7)
+    return [first + timedelta(weeks=i) for i in range(n_expiries)]
+
+def synthetic_option_chain(spot=22000.0, n_expiries=4, n_strikes=100, strike_step=50, atm_iv=0.15,
+                           skew=-0.6, missing=0.05, seed=0, now=None, symbol="NIFTY"):
+    """
+    NSE-format option-chain JSON (as returned by /api/option-chain-indices) with n_strikes
+    strikes around spot for each of n_expiries weekly expiries. LTPs are Black-Scholes prices
+    on a skewed volatility smile, so IV solvers recover the smile; OI and volume are random.
+    A `missing` share of legs is left out, like illiquid strikes on NSE.
+    """
+    rng = np.random.default_rng(seed)
+    now = now or datetime(2026, 1, 5, 11, 0)
+    atm = round(spot / strike_step) * strike_step
+    strikes = atm + strike_step * (np.arange(n_strikes) - n_strikes // 2)
+    moneyness = np.log(strikes / spot)
+
+    data = []
+    expiry_dates = []
+    for expiry in _weekly_expiries(now, n_expiries):
+        expiry_str = expiry.strftime("%d-%b-%Y")
+        expiry_dates.append(expiry_str)
+        T = time_to_expiry(expiry, now)
+        iv = np.maximum(atm_iv + skew * moneyness + 2.0 * moneyness ** 2, 0.05)
+        prices = {leg: bs_price(spot, strikes, T, RISK_FREE_RATE, iv, leg == "CE") for leg in ("CE", "PE")}
+        present = {leg: rng.random(n_strikes) >= missing for leg in ("CE", "PE")}
+        oi = {leg: rng.integers(0, 200_000, n_strikes) for leg in ("CE", "PE")}
+
+        for i, strike in enumerate(strikes):
+            item = {'strikePrice': float(strike), 'expiryDate': expiry_str}
+            for leg in ("CE", "PE"):
+                if not present[leg][i]:
+                    continue
+                ltp = round(float(prices[leg][i]), 2)
+                item[leg] = {
+                    'strikePrice': float(strike),
+                    'expiryDate': expiry_str,
+                    'underlying': symbol,
+                    'identifier': f"OPTIDX{symbol}{expiry_str}{leg}{strike:.2f}",
+                    'openInterest': int(oi[leg][i]),
+                    'changeinOpenInterest': int(rng.integers(-20_000, 20_000)),
+                    'totalTradedVolume': int(rng.integers(0, 2_000_000)),
+                    'impliedVolatility': round(float(iv[i]) * 100, 2),
+                    'lastPrice': ltp,
+                    'bidprice': max(round(ltp - 0.05, 2), 0.05),
+                    'askPrice': round(ltp + 0.05, 2),
+                    'underlyingValue': spot,
+                }
+            data.append(item)
+
+    return {
+        'records': {
+            'expiryDates': expiry_dates,
+            'data': data,
+            'timestamp': now.strftime("%d-%b-%Y %H:%M:%S"),
+            'underlyingValue': spot,
+            'strikePrices': [float(s) for s in strikes],
+        },
+        'filtered': {},
+    }
+
+def synthetic_chain_snapshots(n_snapshots, n_strikes=100, spot=22000.0, strike_step=50, atm_iv=0.15,
+                              skew=-0.6, seed=0, start="2025-01-01"):
+    """
+    Stored option-chain rows (as returned by ChainSnapshotStore.read()) for n_snapshots minute
+    snapshots of one weekly expiry, n_strikes strikes each. Spot follows the minute GBM of gbm_ohlcv();
+    LTPs are Black-Scholes prices on a skewed smile, OI and volume are random.
+    """
+    rng = np.random.default_rng(seed)
+    times = session_index(n_snapshots, "minute", start)
+    spots = gbm_ohlcv(n_snapshots, "minute", start_price=spot, seed=seed, start=start)['Close'].to_numpy()
+    atm = np.round(spots / strike_step) * strike_step
+    strikes = (atm[:, None] + strike_step * (np.arange(n_strikes) - n_strikes // 2)).ravel()
+    spot_rows = np.repeat(spots, n_strikes)
+    expiries = times.normalize() + pd.to_timedelta((3 - times.weekday) % 7, unit="D") + pd.Timedelta(hours=15, minutes=30)
+    T = np.repeat(np.maximum((expiries - times).total_seconds().to_numpy(), 60.0) / (365 * 24 * 3600), n_strikes)
+    moneyness = np.log(strikes / spot_rows)
+    iv = np.maximum(atm_iv + skew * moneyness + 2.0 * moneyness ** 2, 0.05)
+
+    n = len(strikes)
+    df = pd.DataFrame({
+        'Timestamp': np.repeat(times.values, n_strikes),
+        'Expiry': np.repeat(expiries.strftime("%Y-%m-%d"), n_strikes),
+        'Spot': spot_rows,
+        'Strike': strikes,
+    })
+    for leg in ("CE", "PE"):
+        df[f"{leg}_LTP"] = np.round(bs_price(spot_rows, strikes, T, RISK_FREE_RATE, iv, leg == "CE"), 2)
+        df[f"{leg}_OI"] = rng.integers(0, 200_000, n).astype(float)
+        df[f"{leg}_CHG_OI"] = rng.integers(-20_000, 20_000, n).astype(float)
+        df[f"{leg}_IV"] = np.round(iv * 100, 2)
+        df[f"{leg}_VOLUME"] = rng.integers(0, 2_000_000, n).astype(float)
+    return df
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backtester import Backtester
+from synthetic_data import gbm_ohlcv
+
+@pytest.fixture(scope="module")
+def bars():
+    return gbm_ohlcv(1_500, seed=3)
+
+@pytest.fixture(scope="module")
+def predictions(bars):
+    return np.random.default_rng(7).random(len(bars))
+
+# Below 0.5 both signals can fire on one bar; CALL must win, as in the loop
+@pytest.mark.parametrize("threshold", [0.3, 0.45, 0.5, 0.55, 0.6, 0.75])
+def test_run_matches_run_loop(bars, predictions, threshold):
+    backtester = Backtester(bars, predictions, threshold=threshold)
+    results, capital, win_rate = backtester.run()
+    expected, expected_capital, expected_win_rate = backtester.run_loop()
+
+    assert len(results) == len(expected) > 0
+    pd.testing.assert_frame_equal(results.reset_index(drop=True), expected, check_dtype=False,
+                                  check_exact=False, rtol=1e-9, atol=0.011)
+    assert capital == pytest.approx(expected_capital, rel=1e-9)
+    assert win_rate == pytest.approx(expected_win_rate)
+
+@pytest.mark.parametrize("risk_fraction, leverage", [(0.01, 3), (0.05, 10)])
+def test_run_matches_run_loop_for_other_sizing(bars, predictions, risk_fraction, leverage):
+    backtester = Backtester(bars, predictions, risk_fraction=risk_fraction, leverage=leverage)
+    _, capital, win_rate = backtester.run()
+    _, expected_capital, expected_win_rate = backtester.run_loop()
+    assert capital == pytest.approx(expected_capital, rel=1e-9)
+    assert win_rate == pytest.approx(expected_win_rate)
+
+def test_no_trades(bars):
+    backtester = Backtester(bars, np.full(len(bars), 0.5), threshold=0.6)
+    results, capital, win_rate = backtester.run()
+    expected, expected_capital, expected_win_rate = backtester.run_loop()
+    assert results.empty and expected.empty
+    assert capital == expected_capital == 100000
+    assert win_rate == expected_win_rate == 0
+
+def test_run_options_aligns_volatility_series_by_time(bars, predictions):
+    # One snapshot every other day, stamped mid-session, in reverse order
+    per_bar = pd.Series(np.random.default_rng(11).uniform(0.1, 0.4, len(bars)), index=bars.index)
+    snapshots = per_bar.iloc[::2].set_axis(bars.index[::2] + pd.Timedelta(hours=13)).iloc[::-1]
+    backtester = Backtester(bars, predictions)
+    results, capital, _ = backtester.run_options(volatility=snapshots, vol_lag='1D')
+
+    # As of each bar's close: that day's snapshot, else the previous day's
+    expected_sigma = per_bar.iloc[::2].reindex(bars.index).ffill().to_numpy()
+    expected, expected_capital, _ = backtester.run_options(volatility=expected_sigma)
+    pd.testing.assert_frame_equal(results, expected)
+    assert capital == expected_capital
+
+def test_sweep_matches_run(bars, predictions):
+    thresholds, risk_fractions, leverages = [0.45, 0.55, 0.6, 0.7], [0.01, 0.02], [3, 5]
+    # Small chunks so the combinations span several batches
+    sweep = Backtester(bars, predictions).sweep(thresholds, risk_fractions, leverages, chunk_cells=3 * len(bars))
+    assert len(sweep) == len(thresholds) * len(risk_fractions) * len(leverages)
+    for row in sweep.itertuples():
+        results, capital, win_rate = Backtester(bars, predictions, threshold=row.Threshold,
+                                                risk_fraction=row.RiskFraction, leverage=row.Leverage).run()
+        assert row.Trades == len(results)
+        # run() rounds capital to the paisa after every trade
+        assert row.FinalCapital == pytest.approx(capital, rel=1e-6)
+        assert row.WinRate == pytest.approx(win_rate)
+
+@pytest.mark.parametrize("n_bars", [1, 2])
+def test_sweep_on_tiny_frames(bars, predictions, n_bars):
+    import warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        sweep = Backtester(bars.iloc[:n_bars], predictions[:n_bars]).sweep([0.6])
+    assert (sweep['Sharpe'] == 0).all() and (sweep['MaxDrawdown'] >= 0).all()
@@ -0,0 +1,77 @@
+from datetime import datetime
+import numpy as np
+import pytest
+from chain_store import ChainSnapshotStore, _expiry_key
+from nse_scraper import OptionChainColumns
+from synthetic_data import synthetic_option_chain
+
+DAY = datetime(2026, 1, 5)
+N_STRIKES = 20
+
+def snapshot(hour, minute, spot=22000.0):
+    taken = DAY.replace(hour=hour, minute=minute)
+    return synthetic_option_chain(spot, n_expiries=1, n_strikes=N_STRIKES, missing=0, now=taken), taken
+
+@pytest.fixture
+def store(tmp_path):
+    store = ChainSnapshotStore(str(tmp_path))
+    yield store
+    store.close()
+
+def blocks(tmp_path):
+    return sorted(p.name for p in tmp_path.rglob("*.arrow"))
+
+def test_blocks_round_trip_and_prune_by_time(store, tmp_path, monkeypatch):
+    chains = {}
+    for batch in (((10, 0), (10, 1)), ((11, 0), (11, 1))):
+        for hour, minute in batch:
+            chain, taken = snapshot(hour, minute, spot=22000.0 + minute)
+            chains[taken] = chain
+            store.append("NIFTY", chain, taken)
+        store.flush()
+    assert blocks(tmp_path) == ["100000000000-100100000000.arrow", "110000000000-110100000000.arrow"]
+
+    df = store.read("NIFTY", DAY.replace(hour=9), DAY.replace(hour=16))
+    assert len(df) == 4 * N_STRIKES
+    for taken, chain in chains.items():
+        rows = df[df['Timestamp'] == taken]
+        expected = OptionChainColumns.from_json(chain)
+        np.testing.assert_array_equal(rows['Strike'], expected.columns['Strike'])
+        np.testing.assert_array_equal(rows['CE_LTP'], expected.columns['CE_LTP'])
+        assert (rows['Spot'] == expected.spot).all()
+        assert (rows['Expiry'] == _expiry_key(expected.expiries[0])).all()
+
+    opened = []
+    read_block = store._read_block
+    monkeypatch.setattr(store, '_read_block', lambda path, *args: opened.append(path) or read_block(path, *args))
+    df = store.read("NIFTY", DAY.replace(hour=10, minute=30), DAY.replace(hour=11, minute=0), columns=['CE_LTP'])
+    assert [p.rsplit("/", 1)[-1] for p in opened] == ["110000000000-110100000000.arrow"]
+    assert list(df.columns) == ['Timestamp', 'Expiry', 'Strike', 'CE_LTP']
+    assert (df['Timestamp'] == DAY.replace(hour=11)).all() and len(df) == N_STRIKES
+
+def test_failed_write_is_kept_and_retried(store, tmp_path, monkeypatch, capsys):
+    import pyarrow as pa
+    new_file = pa.ipc.new_file
+    failures = []
+
+    def failing_new_file(*args, **kwargs):
+        if not failures:
+            failures.append(1)
+            raise OSError("disk full")
+        return new_file(*args, **kwargs)
+
+    monkeypatch.setattr(pa.ipc, 'new_file', failing_new_file)
+    chain, taken = snapshot(10, 0)
+    store.append("NIFTY", chain, taken)
+    store.flush()
+    assert f"({N_STRIKES} rows kept for retry): disk full" in capsys.readouterr().out
+    # No block and no partial temp file left behind
+    assert not list(tmp_path.rglob("*.arrow*"))
+
+    chain, later = snapshot(10, 5)
+    store.append("NIFTY", chain, later)
+    store.flush()
+    assert blocks(tmp_path) == ["100000000000-100500000000.arrow"]
+    df = store.read("NIFTY", DAY, DAY.replace(hour=23))
+    assert sorted(df['Timestamp'].unique()) == [taken, later]
+    assert len(df) == 2 * N_STRIKES
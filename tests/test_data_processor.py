@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_processor import StreamingIndicators, add_indicators, calculate_rsi
+from synthetic_data import gbm_ohlcv
+
+FLAT = slice(600, 640)  # Longer than the RSI window, so RSI is 0/0 (undefined) inside it
+
+@pytest.fixture(scope="module")
+def bars():
+    bars = gbm_ohlcv(1_000, seed=5)
+    close = bars['Close'].to_numpy().copy()
+    close[FLAT] = close[FLAT.start - 1]
+    return bars.assign(Close=close)
+
+@pytest.fixture(scope="module")
+def streamed(bars):
+    return StreamingIndicators().update_many(bars['Close'], index=bars.index)
+
+def test_rsi_matches_calculate_rsi(bars, streamed):
+    expected = calculate_rsi(bars['Close'])
+    pd.testing.assert_series_equal(streamed['RSI'], expected, check_names=False, rtol=1e-7, atol=1e-7)
+
+def test_rsi_undefined_on_flat_stretch(bars, streamed):
+    # Bars whose whole RSI window is flat have no gains or losses
+    flat_window = bars.index[FLAT.start + 14:FLAT.stop]
+    assert streamed.loc[flat_window, 'RSI'].isna().all()
+    assert calculate_rsi(bars['Close']).loc[flat_window].isna().all()
+    assert streamed['RSI'].iloc[FLAT.stop + 14:].notna().all()
+
+@pytest.mark.parametrize("span", StreamingIndicators.EMA_SPANS)
+def test_ema_matches_pandas(bars, streamed, span):
+    expected = bars['Close'].ewm(span=span, adjust=False).mean()
+    pd.testing.assert_series_equal(streamed[f'EMA_{span}'], expected, check_names=False, rtol=1e-9)
+
+def test_matches_add_indicators(bars, streamed):
+    expected = add_indicators(bars.copy())
+    columns = StreamingIndicators.COLUMNS
+    pd.testing.assert_frame_equal(streamed.loc[expected.index, columns], expected[columns],
+                                  rtol=1e-7, atol=1e-7)
+
+def test_values_are_nan_until_window_full(bars):
+    indicators = StreamingIndicators()
+    first = indicators.update_many(bars['Close'].iloc[:19])
+    assert first['RSI'].iloc[:13].isna().all() and np.isfinite(first['RSI'].iloc[13])
+    assert first['SMA_20'].isna().all() and not indicators.ready
+    assert np.isfinite(indicators.update(bars['Close'].iloc[19])['SMA_20']) and indicators.ready
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from data_processor import add_indicators
+from features import feature_columns
+from inference import InferenceService, NumpyMLP, StackedMLP
+from model import StockPredictor
+from pooled import PooledPredictor, UniverseTensor
+from synthetic_data import gbm_ohlcv
+
+FEATURE_COLS = feature_columns('price')
+
+def fit(predictor, X, y):
+    predictor.build_model()
+    predictor.model.set_params(max_iter=30)
+    predictor.train(X, y)
+    return predictor
+
+@pytest.fixture(scope="module")
+def frames():
+    return {f"T{seed}": add_indicators(gbm_ohlcv(600, start_price=100 * (seed + 1), seed=seed)) for seed in range(3)}
+
+@pytest.fixture(scope="module")
+def predictors(frames):
+    fitted = []
+    for df in frames.values():
+        predictor = StockPredictor()
+        X, y, _ = predictor.prepare_data(df, FEATURE_COLS)
+        fitted.append(fit(predictor, X, y))
+    return fitted
+
+@pytest.fixture(scope="module")
+def pooled(frames):
+    pooled = PooledPredictor(FEATURE_COLS)
+    tensor = pooled.normalize(UniverseTensor.from_frames(frames, FEATURE_COLS))
+    return fit(pooled, tensor.X[tensor.train], tensor.y[tensor.train])
+
+def raw(df):
+    return df[FEATURE_COLS].to_numpy(dtype=np.float64)
+
+def expected_proba(predictor, df):
+    return predictor.model.predict_proba(predictor.scaler.transform(raw(df)))[:, 1]
+
+def test_numpy_mlp_matches_predict_proba(frames, predictors):
+    for df, predictor in zip(frames.values(), predictors):
+        np.testing.assert_allclose(NumpyMLP(predictor).predict(raw(df)), expected_proba(predictor, df),
+                                   rtol=0, atol=1e-6)
+
+def test_stacked_mlp_matches_each_model(frames, predictors):
+    stack = StackedMLP([NumpyMLP(p) for p in predictors])
+    rows = np.array([raw(df)[-1] for df in frames.values()])
+    expected = [expected_proba(p, df)[-1] for p, df in zip(predictors, frames.values())]
+    np.testing.assert_allclose(stack.predict(rows), expected, rtol=0, atol=1e-6)
+    # A subset of the models, out of order
+    np.testing.assert_allclose(stack.predict(rows[[2, 0]], np.array([2, 0])), [expected[2], expected[0]],
+                               rtol=0, atol=1e-6)
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_service_matches_predict_proba(frames, predictors, use_numpy):
+    service = InferenceService(use_numpy=use_numpy)
+    for ticker, predictor in zip(frames, predictors):
+        service.register(ticker, predictor)
+    probabilities = service.predict({ticker: raw(df)[-1] for ticker, df in frames.items()})
+    for (ticker, df), predictor in zip(frames.items(), predictors):
+        assert probabilities[ticker] == pytest.approx(expected_proba(predictor, df)[-1], abs=1e-6)
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_service_applies_pooled_ticker_stats(frames, pooled, use_numpy):
+    service = InferenceService(use_numpy=use_numpy)
+    for i, ticker in enumerate(frames):
+        service.register(i, pooled, ticker=ticker)
+    probabilities = service.predict({i: raw(df)[-1] for i, df in enumerate(frames.values())})
+    for i, (ticker, df) in enumerate(frames.items()):
+        mean, std = pooled.stats[ticker]
+        expected = pooled.model.predict_proba((raw(df)[-1:] - mean) / std)[0, 1]
+        assert probabilities[i] == pytest.approx(expected, abs=1e-6)
+
+def test_pooled_needs_known_ticker(pooled):
+    with pytest.raises(ValueError, match="not in the pooled model's universe"):
+        InferenceService().register("OTHER", pooled)
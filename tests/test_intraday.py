@@ -0,0 +1,59 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from bar_cache import BarCache
+from intraday import date_windows, fetch_history_chunked
+
+FROM, TO = datetime(2024, 1, 1), datetime(2024, 6, 30)
+
+class FakeKite:
+    """fetch_historical_data() stand-in: one bar per day whatever the interval; windows starting in fail_from fail."""
+    def __init__(self, fail_from=()):
+        self.fail_from = set(fail_from)
+
+    def fetch_historical_data(self, instrument_token, from_date, to_date, interval="day", raise_errors=False):
+        if from_date in self.fail_from:
+            if raise_errors:
+                raise ConnectionError("read timed out")
+            return pd.DataFrame()
+        days = pd.date_range(pd.Timestamp(from_date).ceil('D'), to_date, freq='D', tz='Asia/Kolkata')
+        return pd.DataFrame({'Close': np.arange(len(days), dtype=float)}, index=pd.Index(days, name='date'))
+
+def test_failed_window_raises_and_caches_nothing(tmp_path):
+    cache = BarCache(str(tmp_path))
+    kite = FakeKite(fail_from=[FROM])
+    n_windows = len(date_windows(FROM, TO, "minute"))
+    with pytest.raises(RuntimeError, match=f"1 of {n_windows} minute windows"):
+        fetch_history_chunked(kite, 1, FROM, TO, "minute", cache=cache, ticker="X")
+    assert cache.load("X", "minute") is None
+
+    # Once the failure clears, the whole range is fetched
+    kite.fail_from.clear()
+    df = fetch_history_chunked(kite, 1, FROM, TO, "minute", cache=cache, ticker="X")
+    assert df.index[0] == pd.Timestamp(FROM, tz='Asia/Kolkata')
+    assert len(df) == len(cache.load("X", "minute")) == (TO - FROM).days + 1
+
+def test_windows_cover_range():
+    windows = date_windows(FROM, TO, "minute")
+    assert windows[0][0] == FROM and windows[-1][1] == TO
+    assert all((end - start).days <= 60 for start, end in windows)
+
+def test_offline_kite_source_serves_cached_minute_bars(tmp_path):
+    from data_sources import KiteSource, MarketData
+    # Two sessions of minute bars, 20 days apart
+    sessions = [pd.Timestamp.now().normalize() - pd.Timedelta(days=d) + pd.Timedelta(hours=9, minutes=15)
+                for d in (22, 2)]
+    index = pd.DatetimeIndex(np.concatenate([pd.date_range(s, periods=375, freq='min') for s in sessions]),
+                             name='date').tz_localize('Asia/Kolkata')
+    bars = pd.DataFrame({'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': 1.5, 'Volume': 10.0}, index=index)
+    BarCache(str(tmp_path)).append("^NSEI", "minute", bars)
+
+    data = MarketData([KiteSource(None, BarCache(str(tmp_path), offline=True))])
+    minute = data.get("history", ticker="^NSEI", interval="minute", days=10)
+    assert len(minute) == 375 and minute.index[0] == index[375]
+    five = data.get("history", ticker="^NSEI", interval="5minute", days=30)
+    assert len(five) == 2 * 75 and (five['Volume'] == 50).all()
+    # Only the 1-minute series is cached; resampled bars are rebuilt from it
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["_NSEI_minute.parquet"]
+    assert data.get("atm_options", symbol="NIFTY", spot=22000.0) is None
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_processor import add_indicators
+from features import feature_columns
+from live import LiveSignalEngine, ReplayTickSource, RingBarBuilder
+from model import StockPredictor
+from synthetic_data import gbm_ohlcv
+
+FEATURE_COLS = feature_columns('price')
+TOKEN = 256265
+
+def bar_ticks(bars, token=TOKEN):
+    """Four ticks per bar (open, high, low, close) with cumulative volume, like Kite's full mode."""
+    ticks, volume = [], 0.0
+    for time, bar in bars.iterrows():
+        for second, price in zip((0, 15, 30, 45), (bar.Open, bar.High, bar.Low, bar.Close)):
+            volume += bar.Volume / 4
+            ticks.append({'instrument_token': token, 'last_price': price, 'volume_traded': volume,
+                          'exchange_timestamp': time + pd.Timedelta(seconds=second)})
+    return ticks
+
+@pytest.fixture(scope="module")
+def replayed():
+    return gbm_ohlcv(120, freq="minute", start_price=22000, seed=9, start="2026-10-12")
+
+@pytest.fixture(scope="module")
+def source(replayed):
+    return ReplayTickSource(bar_ticks(replayed))
+
+@pytest.fixture(scope="module")
+def history(source):
+    return source.warmup_bars(TOKEN, 60, n_bars=1_000)
+
+@pytest.fixture(scope="module")
+def predictor(history):
+    predictor = StockPredictor()
+    X, y, _ = predictor.prepare_data(add_indicators(history.copy()), FEATURE_COLS)
+    predictor.build_model()
+    predictor.model.set_params(max_iter=50)
+    predictor.train(X, y)
+    return predictor
+
+def test_warmup_bars_end_before_first_tick(replayed, history):
+    assert len(history) == 1_000
+    assert history.index[-1] == replayed.index[0] - pd.Timedelta(minutes=1)
+    assert history['Close'].iloc[-1] == pytest.approx(replayed['Open'].iloc[0])
+
+def test_ring_bar_builder_rebuilds_bars(replayed):
+    builder = RingBarBuilder(60, capacity=50)
+    for tick in bar_ticks(replayed):
+        builder.add_tick(tick['last_price'], tick['exchange_timestamp'], tick['volume_traded'])
+    builder.flush(replayed.index[-1] + pd.Timedelta(minutes=1))
+    bars = builder.bars()
+    expected = replayed.iloc[-50:]
+    # The first tick only sets the volume baseline
+    np.testing.assert_allclose(bars[['Open', 'High', 'Low', 'Close']], expected[['Open', 'High', 'Low', 'Close']])
+    np.testing.assert_allclose(bars['Volume'], expected['Volume'])
+    assert (bars.index == expected.index).all()
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_replay_matches_batch_predictions(replayed, source, history, predictor, use_numpy):
+    signals = {}
+    engine = LiveSignalEngine(FEATURE_COLS, 60, use_numpy=use_numpy,
+                              callback=lambda ticker, time, close, p, ms: signals.__setitem__(time, (close, p)))
+    engine.add_instrument(TOKEN, "^NSEI", predictor, history['Close'])
+    source.run([TOKEN], engine.on_ticks, on_idle=engine.flush)
+
+    # Same bars through add_indicators() and the sklearn model
+    bars = add_indicators(pd.concat([history, replayed]))
+    X, _, _ = predictor.prepare_data(bars, FEATURE_COLS, fit=False, dtype=np.float64)
+    expected = pd.Series(predictor.predict(X), index=bars.index).loc[replayed.index]
+
+    assert list(signals) == list(replayed.index)
+    closes, probabilities = zip(*signals.values())
+    np.testing.assert_allclose(closes, replayed['Close'])
+    np.testing.assert_allclose(probabilities, expected, rtol=0, atol=1e-7)
+
+def test_flush_uses_exchange_time(monkeypatch, history, predictor):
+    import time
+    from instrument_master import exchange_now
+    # On a UTC host, local time runs 5.5 hours behind the IST tick timestamps
+    monkeypatch.setenv("TZ", "UTC")
+    time.tzset()
+    try:
+        signals = []
+        engine = LiveSignalEngine(FEATURE_COLS, 60, callback=lambda *signal: signals.append(signal))
+        engine.add_instrument(TOKEN, "^NSEI", predictor, history['Close'])
+        engine.on_ticks([{'instrument_token': TOKEN, 'last_price': 22000.0,
+                          'exchange_timestamp': exchange_now() - pd.Timedelta(minutes=2)}])
+        engine.flush()
+        assert len(signals) == 1
+    finally:
+        monkeypatch.undo()
+        time.tzset()
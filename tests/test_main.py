@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+import main
+from chain_store import ChainSnapshotStore
+from data_processor import historical_volatility
+from synthetic_data import gbm_ohlcv, synthetic_option_chain
+
+@pytest.mark.parametrize("interval, expected", [("day", 252), ("minute", 252 * 375), ("5minute", 252 * 75),
+                                                ("60minute", 252 * 7)])
+def test_periods_per_year(interval, expected):
+    assert main.periods_per_year(interval) == expected
+
+@pytest.fixture
+def store(tmp_path):
+    store = ChainSnapshotStore(str(tmp_path))
+    yield store
+    store.close()
+
+def test_stored_volatility_uses_snapshots_where_they_exist(store):
+    bars = gbm_ohlcv(60, start_price=22000, seed=2, start="2026-01-05")
+    # Snapshots an hour before the close of the last 10 bars only
+    for day in bars.index[-10:]:
+        taken = (day + pd.Timedelta(hours=14, minutes=30)).to_pydatetime()
+        store.append("NIFTY", synthetic_option_chain(bars.loc[day, 'Close'], n_expiries=1, n_strikes=20,
+                                                     atm_iv=0.25, missing=0, now=taken), taken)
+    store.flush()
+
+    volatility = main.stored_volatility("^NSEI", bars, store)
+    assert volatility.index.equals(bars.index)
+    np.testing.assert_allclose(volatility.iloc[-10:], 0.25, atol=0.02)
+    expected = historical_volatility(bars['Close'])
+    pd.testing.assert_series_equal(volatility.iloc[:-10], expected.iloc[:-10], check_names=False)
+
+def test_stored_volatility_without_snapshots(store):
+    assert main.stored_volatility("^NSEI", gbm_ohlcv(60, seed=2), store) is None
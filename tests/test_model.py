@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_processor import add_indicators
+from features import feature_columns
+from model import StockPredictor, iter_feature_chunks, save_feature_array
+from synthetic_data import gbm_ohlcv
+
+FEATURE_COLS = feature_columns('price')
+
+@pytest.fixture(scope="module")
+def frames():
+    return [add_indicators(gbm_ohlcv(n, start_price=100 * (seed + 1), seed=seed)) for seed, n in ((1, 700), (2, 450))]
+
+@pytest.fixture
+def paths(frames, tmp_path):
+    return [save_feature_array(df, FEATURE_COLS, str(tmp_path / f"T{i}.npy")) for i, df in enumerate(frames)]
+
+def test_chunked_scaling_matches_prepare_data(frames, paths):
+    df = frames[0]
+    split = int(len(df) * 0.8)
+    expected = StockPredictor()
+    X, y, _ = expected.prepare_data(df, FEATURE_COLS, train_rows=split)
+
+    chunked = StockPredictor()
+    # Chunks that don't divide the split, so the last training chunk is a partial one
+    chunked.fit_scaler_chunks(paths[:1], chunk_rows=97)
+    np.testing.assert_allclose(chunked.scaler.mean_, expected.scaler.mean_, rtol=1e-5)
+    np.testing.assert_allclose(chunked.scaler.scale_, expected.scaler.scale_, rtol=1e-5)
+    assert chunked.scaler.n_samples_seen_ == split
+
+    for subset, rows in (("train", slice(0, split)), ("test", slice(split, None)), ("all", slice(None))):
+        chunks = list(chunked.prepare_chunks(paths[:1], chunk_rows=97, subset=subset))
+        assert all(X_chunk.dtype == np.float32 and len(X_chunk) <= 97 for X_chunk, _ in chunks)
+        np.testing.assert_allclose(np.concatenate([c[0] for c in chunks]), X[rows], atol=1e-4)
+        np.testing.assert_array_equal(np.concatenate([c[1] for c in chunks]), y[rows])
+
+def test_scaler_pools_training_rows_of_every_file(frames, paths):
+    train = pd.concat([df.iloc[:int(len(df) * 0.8)] for df in frames])
+    expected = StockPredictor()
+    expected.prepare_data(train, FEATURE_COLS)
+
+    chunked = StockPredictor()
+    chunked.fit_scaler_chunks(paths, chunk_rows=128)
+    np.testing.assert_allclose(chunked.scaler.mean_, expected.scaler.mean_, rtol=1e-5)
+    np.testing.assert_allclose(chunked.scaler.scale_, expected.scaler.scale_, rtol=1e-5)
+
+def test_train_chunks_fits_a_model(frames, paths):
+    predictor = StockPredictor()
+    predictor.fit_scaler_chunks(paths, chunk_rows=200)
+    predictor.train_chunks(paths, chunk_rows=200, epochs=2)
+    X_test = np.concatenate([X for X, _ in predictor.prepare_chunks(paths, subset="test")])
+    n_test = sum(len(df) - int(len(df) * 0.8) for df in frames)
+    probabilities = predictor.predict(X_test)
+    assert probabilities.shape == (n_test,)
+    assert ((probabilities >= 0) & (probabilities <= 1)).all()
+    assert sum(len(X) for X, _ in iter_feature_chunks(paths, subset="all")) == sum(map(len, frames))
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from data_processor import add_indicators
+from features import feature_columns
+from model_registry import ModelRegistry
+from synthetic_data import gbm_ohlcv
+
+PRICE_COLS = feature_columns('price')
+OPTION_COLS = feature_columns('price', 'ATM_IV')
+
+@pytest.fixture(scope="module")
+def df():
+    df = add_indicators(gbm_ohlcv(700, seed=4))
+    df['ATM_IV'] = np.random.default_rng(4).uniform(0.1, 0.3, len(df))
+    return df
+
+@pytest.fixture(autouse=True)
+def quick_fits(monkeypatch):
+    from model import StockPredictor
+    build_model = StockPredictor.build_model
+    monkeypatch.setattr(StockPredictor, 'build_model',
+                        lambda self, *args: build_model(self, *args).set_params(max_iter=20))
+
+def test_feature_sets_keep_separate_models(tmp_path, df):
+    registry = ModelRegistry(str(tmp_path))
+    split = int(len(df) * 0.8)
+    price, _, _ = registry.fit("X.NS", df, PRICE_COLS, split)
+    option, _, _ = registry.fit("X.NS", df, OPTION_COLS, split)
+    assert len(list(tmp_path.iterdir())) == 2
+
+    # Each kind of run reloads its own model rather than refitting over the other
+    for cols, fitted in ((PRICE_COLS, price), (OPTION_COLS, option)):
+        loaded, meta = registry.load("X.NS", cols)
+        assert meta['feature_cols'] == cols
+        np.testing.assert_array_equal(loaded.model.coefs_[0], fitted.model.coefs_[0])
+
+def test_model_trained_past_split_is_refitted(tmp_path, df, capsys):
+    registry = ModelRegistry(str(tmp_path))
+    short = df.iloc[-200:]
+    registry.fit("X.NS", short, PRICE_COLS, int(len(short) * 0.8))
+    split = int(len(df) * 0.8)
+    registry.fit("X.NS", df, PRICE_COLS, split)
+    assert "past this split; refitting" in capsys.readouterr().out
+    _, meta = registry.load("X.NS", PRICE_COLS)
+    assert meta['train_end'] == df.index[split - 1] and meta['n_rows'] == split
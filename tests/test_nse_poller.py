@@ -0,0 +1,105 @@
+import asyncio
+import json
+from datetime import timedelta
+import pytest
+from chain_store import ChainSnapshotStore
+from instrument_master import exchange_now
+from nse_poller import NSEPoller
+from nse_scraper import NSE_HOME, option_chain_url
+from synthetic_data import synthetic_option_chain
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data
+        self.content = json.dumps(data).encode() if data is not None else b""
+
+    def json(self):
+        return self._data
+
+class FakeSession:
+    """
+    Async session stand-in: chain requests answer 401 until the home page has been fetched
+    (cookies set), and symbols in `failing` answer 503 for their next `failing[symbol]` requests.
+    """
+    def __init__(self, chains, failing=None):
+        self.chains = chains
+        self.failing = dict(failing or {})
+        self.has_cookies = False
+        self.home_requests = 0
+        self.chain_requests = []
+        self.closed = False
+
+    async def get(self, url, timeout=None):
+        await asyncio.sleep(0)  # Let concurrent requests interleave
+        if url == NSE_HOME:
+            self.home_requests += 1
+            self.has_cookies = True
+            return FakeResponse(200)
+        symbol = next(s for s in self.chains if option_chain_url(s) == url)
+        self.chain_requests.append(symbol)
+        if not self.has_cookies:
+            return FakeResponse(401)
+        if self.failing.get(symbol):
+            self.failing[symbol] -= 1
+            return FakeResponse(503)
+        return FakeResponse(200, self.chains[symbol])
+
+    async def close(self):
+        self.closed = True
+
+@pytest.fixture
+def chains():
+    return {symbol: synthetic_option_chain(spot, n_expiries=2, n_strikes=10, symbol=symbol)
+            for symbol, spot in (("NIFTY", 22000.0), ("BANKNIFTY", 48000.0))}
+
+def make_poller(session, interval=0, **kwargs):
+    return NSEPoller(list(session.chains), interval=interval, session_factory=lambda: session, **kwargs)
+
+def test_401_refreshes_cookies_once(chains):
+    session = FakeSession(chains)
+    poller = make_poller(session)
+    snapshot = asyncio.run(poller.poll_once())
+    assert snapshot == chains
+    # Both symbols got a 401, but only one cookie refresh was made
+    assert session.home_requests == 1
+    assert sorted(session.chain_requests) == sorted(list(chains) * 2)
+
+def test_failing_symbol_backs_off_without_blocking_others(chains, monkeypatch):
+    monkeypatch.setattr("nse_poller.random.uniform", lambda a, b: 1.0)
+    session = FakeSession(chains, failing={"BANKNIFTY": 3})
+    session.has_cookies = True
+    poller = make_poller(session, base_backoff=10.0, max_backoff=25.0)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        delays = []
+        for _ in range(3):
+            assert set(await poller.poll_once()) == {"NIFTY"}
+            delays.append(poller._retry_at["BANKNIFTY"] - loop.time())
+            # Still backing off: skipped without a request
+            requests = len(session.chain_requests)
+            assert set(await poller.poll_once()) == {"NIFTY"}
+            assert session.chain_requests[requests:] == ["NIFTY"]
+            poller._retry_at["BANKNIFTY"] = 0  # As if the backoff had elapsed
+        assert set(await poller.poll_once()) == set(chains)
+        return delays
+
+    delays = asyncio.run(scenario())
+    # Exponential, capped at max_backoff
+    assert delays == pytest.approx([10.0, 20.0, 25.0], abs=0.5)
+    assert "BANKNIFTY" not in poller._failures
+
+def test_run_fills_chain_store(chains, tmp_path):
+    session = FakeSession(chains)
+    store = ChainSnapshotStore(str(tmp_path))
+    try:
+        # Snapshots are stored to the millisecond, so keep the polls apart
+        asyncio.run(make_poller(session, interval=0.01).run(store.append_snapshot, iterations=3))
+        store.flush()
+        now = exchange_now()
+        for symbol in chains:
+            assert store.read(symbol, now - timedelta(hours=1), now)['Timestamp'].nunique() == 3
+    finally:
+        store.close()
+    assert session.closed
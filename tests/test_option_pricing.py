@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from option_pricing import bs_greeks, bs_price, chain_greeks, implied_volatility
+
+S, T, R = 100.0, 0.25, 0.065
+STRIKES = np.array([70.0, 85.0, 95.0, 100.0, 105.0, 115.0, 130.0])
+
+@pytest.mark.parametrize("is_call", [True, False])
+@pytest.mark.parametrize("sigma", [0.08, 0.2, 0.6])
+def test_implied_volatility_round_trip(is_call, sigma):
+    # Deep ITM and OTM at both ends of the ladder
+    prices = bs_price(S, STRIKES, T, R, sigma, is_call)
+    iv = implied_volatility(prices, S, STRIKES, T, R, is_call)
+    # A quote with no time value left sits on the no-arbitrage bound and has no implied vol
+    intrinsic = np.maximum(S - STRIKES * np.exp(-R * T), 0) if is_call else np.maximum(STRIKES * np.exp(-R * T) - S, 0)
+    priced = prices - intrinsic > 1e-9
+    assert np.isfinite(iv[priced]).all()
+    np.testing.assert_allclose(bs_price(S, STRIKES[priced], T, R, iv[priced], is_call), prices[priced],
+                               rtol=0, atol=1e-5)
+    # Where the price still carries some vega, the volatility itself comes back
+    vega = bs_greeks(S, STRIKES, T, R, sigma, is_call)['vega']
+    sensitive = vega > 1e-3
+    assert sensitive.sum() >= 3
+    np.testing.assert_allclose(iv[sensitive], sigma, rtol=1e-4)
+
+def test_implied_volatility_out_of_bounds_is_nan():
+    K = np.full(6, 90.0)
+    is_call = np.array([True, True, True, False, False, False])
+    disc_k = 90.0 * np.exp(-R * T)
+    prices = np.array([
+        S - disc_k - 0.5,   # Call below intrinsic
+        S + 1.0,            # Call above the spot
+        np.nan,             # No price
+        -1.0,               # Negative put
+        disc_k + 1.0,       # Put above the discounted strike
+        bs_price(S, 90.0, T, R, 0.2, False),  # The one valid quote
+    ])
+    iv = implied_volatility(prices, S, K, T, R, is_call)
+    assert np.isnan(iv[:5]).all()
+    assert iv[5] == pytest.approx(0.2, rel=1e-4)
+
+@pytest.mark.parametrize("is_call", [True, False])
+def test_greeks_match_finite_differences(is_call):
+    sigma, q = 0.25, 0.01
+    greeks = bs_greeks(S, STRIKES, T, R, sigma, is_call, q)
+
+    def price(s=S, t=T, vol=sigma):
+        return bs_price(s, STRIKES, t, R, vol, is_call, q)
+
+    h = 1e-2
+    np.testing.assert_allclose(greeks['price'], price(), rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(greeks['delta'], (price(s=S + h) - price(s=S - h)) / (2 * h), atol=1e-6)
+    np.testing.assert_allclose(greeks['gamma'], (price(s=S + h) - 2 * price() + price(s=S - h)) / h ** 2,
+                               atol=1e-5)
+    # Theta per calendar day: the value lost as one day less remains
+    dt = 1e-5
+    np.testing.assert_allclose(greeks['theta'], -(price(t=T + dt) - price(t=T - dt)) / (2 * dt) / 365, atol=1e-6)
+    # Vega per vol point
+    dv = 1e-5
+    np.testing.assert_allclose(greeks['vega'], (price(vol=sigma + dv) - price(vol=sigma - dv)) / (2 * dv) / 100,
+                               atol=1e-6)
+
+def test_chain_greeks_solves_both_legs():
+    ce = bs_price(S, STRIKES, T, R, 0.18, True)
+    pe = bs_price(S, STRIKES, T, R, 0.22, False)
+    pe[0] = np.nan  # Untraded leg
+    df = chain_greeks(STRIKES, ce, pe, S, T, R)
+
+    assert list(df['Strike']) == list(STRIKES)
+    np.testing.assert_allclose(df['CE_PRICE'], ce, atol=1e-5)
+    np.testing.assert_allclose(df['PE_PRICE'].iloc[1:], pe[1:], atol=1e-5)
+    np.testing.assert_allclose(df['CE_IMPLIED_VOL'].iloc[2:-1], 0.18, rtol=1e-4)
+    np.testing.assert_allclose(df['PE_IMPLIED_VOL'].iloc[2:-1], 0.22, rtol=1e-4)
+    for name in ('IMPLIED_VOL', 'PRICE', 'DELTA', 'GAMMA', 'THETA', 'VEGA'):
+        assert np.isnan(df[f'PE_{name}'].iloc[0])
+        assert df[f'CE_{name}'].notna().all()
+
+    expected = bs_greeks(S, STRIKES, T, R, 0.18, True)
+    np.testing.assert_allclose(df['CE_DELTA'].iloc[2:-1], expected['delta'][2:-1], atol=1e-5)
+    np.testing.assert_allclose(df['CE_VEGA'].iloc[2:-1], expected['vega'][2:-1], atol=1e-5)
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory
+from model import StockPredictor
+from instrumentation import timed
+from scanner import process_pool
+
+def walk_forward_splits(n_rows, n_folds=5, mode="expanding", train_size=None):
+    """
+    Returns (train_start, test_start, test_end) row bounds for each fold.
+    The last n_folds blocks are tested in order; 'expanding' trains on everything before
+    each block, 'rolling' on a fixed window of train_size rows (default: the first block).
+    """
+    test_size = n_rows // (n_folds + 1)
+    if test_size < 1:
+        raise ValueError(f"Not enough rows ({n_rows}) for {n_folds} folds")
+    first_test = n_rows - n_folds * test_size
+    train_size = train_size or first_test
+
+    splits = []
+    for k in range(n_folds):
+        test_start = first_test + k * test_size
+        test_end = test_start + test_size
+        train_start = 0 if mode == "expanding" else max(0, test_start - train_size)
+        splits.append((train_start, test_start, test_end))
+    return splits
+
+def _fit_fold(shm_name, shape, dtype, bounds):
+    """Fits one fold on rows of the shared feature block (last column is the target)."""
+    train_start, test_start, test_end = bounds
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        data = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        X_train, y_train = data[train_start:test_start, :-1], data[train_start:test_start, -1].astype(int)
+        X_test, y_test = data[test_start:test_end, :-1], data[test_start:test_end, -1].astype(int)
+
+        # Scaler is fitted on the fold's training rows only
+        predictor = StockPredictor()
+        X_train = predictor.scaler.fit_transform(X_train)
+        X_test = predictor.scaler.transform(X_test)
+        del data
+
+        predictor.build_model()
+        predictor.train(X_train, y_train)
+        return test_start, predictor.predict(X_test), predictor.model.score(X_test, y_test)
+    finally:
+        shm.close()
+
+@timed("walk_forward")
+def walk_forward(df, feature_cols, n_folds=5, mode="expanding", train_size=None, workers=None):
+    """
+    Walk-forward training and out-of-sample scoring on a frame from add_indicators().
+    Folds are fitted on a process pool; the feature matrix is placed in shared memory once
+    instead of being pickled per fold.
+    Returns (df_oos, probabilities, folds) where df_oos/probabilities cover the tested rows
+    and can be passed straight to Backtester.
+    """
+    data = np.column_stack([df[feature_cols].to_numpy(dtype=np.float32),
+                            df['Target'].to_numpy(dtype=np.float32)])
+    splits = walk_forward_splits(len(data), n_folds, mode, train_size)
+
+    shm = shared_memory.SharedMemory(create=True, size=data.nbytes)
+    try:
+        shared = np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf)
+        shared[:] = data
+        del shared
+
+        with process_pool(workers) as pool:
+            futures = [pool.submit(_fit_fold, shm.name, data.shape, data.dtype, bounds) for bounds in splits]
+            fold_results = [f.result() for f in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    first_test = splits[0][1]
+    last_test = splits[-1][2]
+    probabilities = np.empty(last_test - first_test)
+    folds = []
+    for (train_start, test_start, test_end), (_, probs, accuracy) in zip(splits, fold_results):
+        probabilities[test_start - first_test:test_end - first_test] = probs
+        folds.append({
+            'Train Start': df.index[train_start],
+            'Test Start': df.index[test_start],
+            'Test End': df.index[test_end - 1],
+            'Train Rows': test_start - train_start,
+            'Accuracy': accuracy
+        })
+
+    return df.iloc[first_test:last_test], probabilities, pd.DataFrame(folds)